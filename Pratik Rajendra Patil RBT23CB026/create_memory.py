@@ -1,4 +1,9 @@
-from langchain_community.document_loaders import PyPDFLoader, DirectoryLoader
+import argparse
+import glob
+import hashlib
+import json
+import os
+from langchain_community.document_loaders import PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
@@ -6,30 +11,195 @@ from langchain_community.vectorstores import FAISS
 # Set data path
 DATA_PATH = "data/"
 
-def load_pdf_files(data_path):
-    loader = DirectoryLoader(data_path, glob='*.pdf', loader_cls=PyPDFLoader)
-    documents = loader.load()
-    return documents
+# Vector store path
+DB_FAISS_PATH = "vectorstore/db_faiss"
+
+# Chunking and embedding settings; changing any of them forces a full rebuild
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 50
+
+# Kept next to index.faiss / index.pkl: file hashes and the ids of their chunks
+MANIFEST_NAME = "manifest.json"
 
-# Load PDF documents
-documents = load_pdf_files(DATA_PATH)
 
 def create_chunks(documents):
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
     texts = text_splitter.split_documents(documents)
     return texts
 
-# Create text chunks
-text_chunks = create_chunks(documents)
 
 def get_embedding_model():
-    embedding_model = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+    embedding_model = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
     return embedding_model
 
-embedding_model = get_embedding_model()
 
-# Vector store path
-DB_FAISS_PATH = "vectorstore/db_faiss"
+def sha256_text(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def scan_pdf_files(data_path):
+    """{file name relative to data_path: sha256 of its bytes} for every PDF directly in data_path."""
+    paths = sorted(glob.glob(os.path.join(data_path, "*.pdf")))
+    return {os.path.relpath(path, data_path): file_sha256(path) for path in paths}
+
+
+def chunk_file(data_path, name):
+    """
+    Chunks of one PDF with a stable id each: a hash of the file name, page and chunk
+    text, so an unchanged chunk keeps its id (and its vector) when the file is edited.
+
+    Returns:
+        dict: {chunk_id: (chunk Document, sha256 of the chunk text)}
+    """
+    chunks = create_chunks(PyPDFLoader(os.path.join(data_path, name)).load())
+    result = {}
+    seen = {}
+    for chunk in chunks:
+        content_hash = sha256_text(chunk.page_content)
+        base = f"{name}\0{chunk.metadata.get('page')}\0{content_hash}"
+        # The same text can repeat on a page; number the repeats
+        seen[base] = seen.get(base, 0) + 1
+        result[sha256_text(f"{base}\0{seen[base]}")] = (chunk, content_hash)
+    return result
+
+
+def load_manifest(db_path):
+    try:
+        with open(os.path.join(db_path, MANIFEST_NAME), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_manifest(db_path, manifest):
+    path = os.path.join(db_path, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def current_settings():
+    return {"embedding_model": EMBEDDING_MODEL_NAME, "chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP}
+
+
+def load_existing_index(db_path, embedding_model, manifest):
+    """The saved index and its manifest, or (None, None) if a full rebuild is needed."""
+    if manifest is None or manifest.get("settings") != current_settings():
+        return None, None
+    if not os.path.exists(os.path.join(db_path, "index.faiss")):
+        return None, None
+    db = FAISS.load_local(db_path, embedding_model, allow_dangerous_deserialization=True)
+    return db, manifest
+
+
+def update_vector_store(data_path=DATA_PATH, db_path=DB_FAISS_PATH, full=False, embedding_model=None):
+    """
+    Brings the FAISS index in `db_path` in line with the PDFs in `data_path`.
+
+    Unchanged files are skipped without being read. Changed and new files are
+    re-chunked, but only chunks that aren't already in the index are embedded; a chunk
+    whose text was indexed before (e.g. a renamed file, or pages shifted by an edit)
+    reuses its stored vector. Chunks of removed files and stale chunks of changed files
+    are deleted. A missing or incompatible index (or full=True) is rebuilt from scratch.
+
+    Returns:
+        dict: counts of files and chunks added, removed, embedded and reused
+    """
+    embedding_model = embedding_model or get_embedding_model()
+    files = scan_pdf_files(data_path)
+
+    db, manifest = (None, None) if full else load_existing_index(db_path, embedding_model, load_manifest(db_path))
+    if db is None:
+        print("Building the vector store from scratch...")
+        manifest = {"settings": current_settings(), "files": {}}
+    indexed = manifest["files"]
+
+    removed = [name for name in indexed if name not in files]
+    changed = [name for name, digest in files.items() if indexed.get(name, {}).get("sha256") != digest]
+    stats = {"files_unchanged": len(files) - len(changed), "files_changed": len(changed), "files_removed": len(removed),
+             "chunks_added": 0, "chunks_deleted": 0, "chunks_embedded": 0, "chunks_reused": 0}
+
+    to_delete = {}  # chunk_id -> content hash
+    for name in removed:
+        to_delete.update(indexed.pop(name)["chunks"])
+
+    to_add = {}  # chunk_id -> (Document, content hash)
+    for name in changed:
+        print(f"Chunking {name}...")
+        new_chunks = chunk_file(data_path, name)
+        old_chunks = indexed.get(name, {}).get("chunks", {})
+        to_delete.update({cid: h for cid, h in old_chunks.items() if cid not in new_chunks})
+        to_add.update({cid: c for cid, c in new_chunks.items() if cid not in old_chunks})
+        indexed[name] = {"sha256": files[name], "chunks": {cid: h for cid, (_, h) in new_chunks.items()}}
+
+    # Vectors of the chunks about to be deleted, by text hash, for chunks that come back unchanged
+    reusable = {}
+    if db is not None and to_delete:
+        positions = {cid: pos for pos, cid in db.index_to_docstore_id.items()}
+        for cid, content_hash in to_delete.items():
+            if cid in positions:
+                reusable.setdefault(content_hash, db.index.reconstruct(int(positions[cid])).tolist())
+
+    ids = list(to_add)
+    to_embed = [cid for cid in ids if to_add[cid][1] not in reusable]
+    vectors = {}
+    if to_embed:
+        print(f"Embedding {len(to_embed)} new chunks...")
+        embedded = embedding_model.embed_documents([to_add[cid][0].page_content for cid in to_embed])
+        vectors.update(zip(to_embed, embedded))
+    for cid in ids:
+        if cid not in vectors:
+            vectors[cid] = reusable[to_add[cid][1]]
+    stats.update(chunks_added=len(ids), chunks_embedded=len(to_embed), chunks_reused=len(ids) - len(to_embed))
+
+    if db is not None and to_delete:
+        present = set(db.index_to_docstore_id.values())
+        stale = [cid for cid in to_delete if cid in present]
+        if stale:
+            db.delete(stale)
+        stats["chunks_deleted"] = len(stale)
+
+    if ids:
+        text_embeddings = [(to_add[cid][0].page_content, vectors[cid]) for cid in ids]
+        metadatas = [to_add[cid][0].metadata for cid in ids]
+        if db is None:
+            db = FAISS.from_embeddings(text_embeddings, embedding_model, metadatas=metadatas, ids=ids)
+        else:
+            db.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+
+    if db is None:
+        print(f"No PDF files found in {data_path}; nothing to index.")
+        return stats
+
+    if ids or removed or changed or full:
+        db.save_local(db_path)
+        save_manifest(db_path, manifest)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create or incrementally update the FAISS vector store from PDFs")
+    parser.add_argument("--data", default=DATA_PATH, help="Folder with the PDF files")
+    parser.add_argument("--db", default=DB_FAISS_PATH, help="FAISS vector store folder")
+    parser.add_argument("--full", action="store_true", help="Ignore the existing index and re-embed everything")
+    args = parser.parse_args()
+
+    stats = update_vector_store(args.data, args.db, full=args.full)
+    print(f"Files: {stats['files_changed']} new/changed, {stats['files_removed']} removed, "
+          f"{stats['files_unchanged']} unchanged")
+    print(f"Chunks: {stats['chunks_added']} added ({stats['chunks_embedded']} embedded, "
+          f"{stats['chunks_reused']} reused), {stats['chunks_deleted']} deleted")
+
 
-db = FAISS.from_documents(text_chunks, embedding_model)
-db.save_local(DB_FAISS_PATH)
+if __name__ == "__main__":
+    main()
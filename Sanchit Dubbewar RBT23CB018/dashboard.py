@@ -4,11 +4,10 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from datetime import datetime, timedelta
-import os
-from src.fetch_live_data_nasa import fetch_live_data
-from src.predict_live import generate_forecast
-from src.ga_optimization import run_ga_optimization
-from src.tank_simulation import simulate_tank_levels
+from concurrent.futures import ThreadPoolExecutor
+import time
+from src.pipeline import StageCache, PipelineProgress, run_pipeline, export_outputs
+from src.tank_simulation import sweep_tank_configurations
 
 # Page configuration
 st.set_page_config(
@@ -18,6 +17,21 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+
+@st.cache_resource
+def get_executor():
+    """One background worker shared by all sessions; analyses run there, not in the script thread."""
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="rainflow-pipeline")
+
+
+@st.cache_resource
+def get_stage_cache():
+    """Stage cache shared by all sessions (and persisted on disk across restarts)."""
+    return StageCache()
+
+
+STAGE_ICONS = {"pending": "⏸️", "running": "🔄", "cached": "⚡", "computed": "✅"}
+
 # Custom CSS for better styling 
 st.markdown("""
 <style>
@@ -227,6 +241,8 @@ with st.sidebar:
     if 'system_status' in st.session_state:
         if st.session_state.system_status == 'success':
             st.markdown('<div class="success-box">✅ System Ready</div>', unsafe_allow_html=True)
+        elif st.session_state.system_status == 'running':
+            st.markdown('<div class="info-box">🔄 Analysis Running</div>', unsafe_allow_html=True)
         elif st.session_state.system_status == 'error':
             st.markdown('<div class="info-box">❌ System Error</div>', unsafe_allow_html=True)
     else:
@@ -238,82 +254,59 @@ col1, col2 = st.columns([2, 1])
 with col1:
     st.markdown("### 🚀 Run Smart System")
     
+    job = st.session_state.get('job')
+    running = job is not None and not job.done()
+
     # Run button with enhanced styling
-    if st.button("🚀 Launch Smart Analysis", use_container_width=True):
+    if st.button("🚀 Launch Smart Analysis", use_container_width=True, disabled=running):
+        # Runs in the background; unchanged stages are served from the stage cache
+        st.session_state.progress = PipelineProgress()
+        st.session_state.job = get_executor().submit(
+            run_pipeline,
+            lat=lat,
+            lon=lon,
+            catchment_area_m2=catchment_area,
+            runoff_coefficient=runoff_coefficient,
+            tank_capacity_liters=tank_capacity,
+            initial_storage_liters=initial_storage,
+            usage_min=usage_min,
+            usage_max=usage_max,
+            cache=get_stage_cache(),
+            progress=st.session_state.progress
+        )
+        st.session_state.system_status = 'running'
+        job, running = st.session_state.job, True
+
+    if running:
+        # Progress tracking (polled; the page reruns until the job is done)
+        snapshot = st.session_state.progress.snapshot()
+        st.progress(snapshot['percent'])
+        st.text(snapshot['message'])
+        st.caption("  ".join(f"{STAGE_ICONS[status]} {stage}" for stage, status in snapshot['stages'].items()))
+    elif job is not None:
+        st.session_state.job = None
         try:
-            # Initialize session state
-            st.session_state.system_status = 'running'
-            
-            # Progress tracking
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            # Step 1: Fetch live data
-            status_text.text("📡 Fetching live NASA rainfall data (45 days to ensure 30+ valid days)...")
-            progress_bar.progress(20)
-            
-            with st.spinner("🌍 Connecting to NASA POWER API (fetching 45 days for LSTM model)..."):
-                live_df = fetch_live_data(lat=lat, lon=lon, days_back=45)
-            
-            progress_bar.progress(40)
-            status_text.text("🔮 Generating LSTM rainfall forecast...")
-            
-            # Step 2: Generate forecast
-            with st.spinner("🤖 Running AI prediction model..."):
-                forecast_df = generate_forecast(live_df)
-            
-            progress_bar.progress(60)
-            status_text.text("⚙️ Running Genetic Algorithm optimization...")
-            
-            # Step 3: GA optimization
-            with st.spinner("🧬 Optimizing water usage plan..."):
-                optimized_df, merged_df = run_ga_optimization(
-                    forecast_df,
-                    catchment_area,
-                    runoff_coefficient,
-                    tank_capacity,
-                    initial_storage,
-                    usage_min,
-                    usage_max
-                )
-            
-            progress_bar.progress(80)
-            status_text.text("💧 Simulating tank levels...")
-            
-            # Step 4: Tank simulation
-            with st.spinner("📊 Calculating water balance..."):
-                simulated_df = simulate_tank_levels(
-                    merged_df=merged_df,
-                    catchment_area_m2=catchment_area,
-                    runoff_coefficient=runoff_coefficient,
-                    tank_capacity_liters=tank_capacity,
-                    initial_storage_liters=initial_storage
-                )
-            
-            progress_bar.progress(100)
-            status_text.text("✅ Analysis complete!")
-            
-            # Success message
-            st.success("🎉 Smart analysis completed successfully!")
-            st.session_state.system_status = 'success'
-            
-            # Store results in session state
-            st.session_state.forecast_df = forecast_df
-            st.session_state.merged_df = merged_df
-            st.session_state.simulated_df = simulated_df
-            st.session_state.live_df = live_df
-            
-            # Save outputs
-            os.makedirs("outputs", exist_ok=True)
-            forecast_df.to_csv("outputs/predictions_next_7_days_on_NASA_data.csv", index=False)
-            merged_df.to_csv("outputs/final_plan.csv", index=False)
-            simulated_df.to_csv("outputs/tank_simulation_next_7_days.csv", index=False)
-            
+            result = job.result()
         except Exception as e:
             st.error(f"❌ Error during analysis: {str(e)}")
             st.session_state.system_status = 'error'
             st.stop()
 
+        # Success message
+        st.success("🎉 Smart analysis completed successfully!")
+        st.caption("  ".join(f"{STAGE_ICONS[status]} {stage} ({status})" for stage, status in result.stages.items()))
+        st.session_state.system_status = 'success'
+
+        # Store results in session state
+        st.session_state.forecast_df = result.forecast_df
+        st.session_state.merged_df = result.merged_df
+        st.session_state.simulated_df = result.simulated_df
+        st.session_state.live_df = result.live_df
+        st.session_state.ga_score = result.ga_score
+
+        # Save outputs (only files whose content changed)
+        export_outputs(result)
+
 with col2:
     st.markdown("### 📍 Current Location")
     # Create a DataFrame for the map
@@ -471,6 +464,32 @@ if 'system_status' in st.session_state and st.session_state.system_status == 'su
             st.metric("💧 Max Storage", f"{st.session_state.simulated_df['storage_liters'].max():.0f} L")
         with col3:
             st.metric("⚠️ Overflow Days", f"{len(st.session_state.simulated_df[st.session_state.simulated_df['overflow_liters'] > 0])}")
+
+        # What-if sweep over catchment area and tank capacity (one vectorized simulation)
+        st.markdown("#### 🔍 What-if: Catchment Area vs Tank Capacity")
+        scale = [0.5, 0.75, 1.0, 1.5, 2.0, 3.0]
+        sweep_df = sweep_tank_configurations(
+            st.session_state.merged_df,
+            catchment_areas_m2=[catchment_area * f for f in scale],
+            tank_capacities_liters=[tank_capacity * f for f in scale],
+            runoff_coefficient=runoff_coefficient,
+            initial_storage_liters=initial_storage
+        )
+        sweep_metric = st.selectbox(
+            "Metric",
+            ["total_shortage_liters", "total_overflow_liters", "final_storage_liters"],
+            format_func=lambda m: m.replace("_", " ").title()
+        )
+        heatmap = sweep_df.pivot(index="catchment_area_m2", columns="tank_capacity_liters", values=sweep_metric)
+        fig = px.imshow(
+            heatmap,
+            labels=dict(x="Tank Capacity (liters)", y="Catchment Area (m²)", color="Liters"),
+            text_auto=".0f",
+            aspect="auto",
+            color_continuous_scale="Blues"
+        )
+        fig.update_layout(height=400)
+        st.plotly_chart(fig, use_container_width=True)
     
     with tab4:
         st.markdown("### 📈 System Summary")
@@ -513,7 +532,7 @@ if 'system_status' in st.session_state and st.session_state.system_status == 'su
                 <p style="font-size: 2rem; margin: 0;">{:.0f}</p>
                 <p>GA fitness score</p>
             </div>
-            """.format(1000),  # Placeholder - you can get this from GA
+            """.format(st.session_state.ga_score),
             unsafe_allow_html=True)
         
         # Download section
@@ -552,3 +571,8 @@ st.markdown("""
     <p>Built with Streamlit • LSTM • Genetic Algorithms • Real-time Optimization</p>
 </div>
 """, unsafe_allow_html=True)
+
+# Poll the background analysis: rerun the page until it finishes
+if st.session_state.get('job') is not None:
+    time.sleep(0.5)
+    st.rerun()
@@ -0,0 +1,133 @@
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from src.fetch_live_data_nasa import fetch_rainfall_history
+from src.predict_live import WINDOW_SIZE, get_forecaster
+
+
+def read_locations(path):
+    """
+    Locations CSV with 'lat' and 'lon' columns and an optional 'site' name column.
+    Sites without a name are labelled by their coordinates.
+    """
+    locations = pd.read_csv(path)
+    locations.columns = [c.strip().lower() for c in locations.columns]
+    missing = {"lat", "lon"} - set(locations.columns)
+    if missing:
+        raise ValueError(f"❌ Locations file needs 'lat' and 'lon' columns, missing: {sorted(missing)}")
+    if "site" not in locations.columns:
+        locations["site"] = [f"{lat:.2f}N_{lon:.2f}E" for lat, lon in zip(locations["lat"], locations["lon"])]
+    return locations[["site", "lat", "lon"]].reset_index(drop=True)
+
+
+def fetch_window(lat, lon, days_back=45):
+    """Last 30 valid days of rainfall for one location (served from the NASA POWER cache when possible)."""
+    end_date = datetime.now(timezone.utc).date()
+    start_date = end_date - timedelta(days=days_back - 1)
+    history, _ = fetch_rainfall_history(lat, lon, start_date, end_date)
+    history = history.sort_values("date")
+    if len(history) < WINDOW_SIZE:
+        raise ValueError(f"Need {WINDOW_SIZE} valid days, got {len(history)}")
+    return history.tail(WINDOW_SIZE).reset_index(drop=True)
+
+
+def fetch_windows(locations, days_back=45, max_workers=8):
+    """
+    Fetches every location's history concurrently.
+
+    Returns:
+        tuple: (list of 30-day DataFrames or None per location, list of error messages or None)
+    """
+    def fetch(row):
+        try:
+            return fetch_window(row.lat, row.lon, days_back), None
+        except Exception as e:
+            return None, str(e)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(fetch, locations.itertuples(index=False)))
+    return [w for w, _ in results], [e for _, e in results]
+
+
+def batch_forecast(locations, days_to_predict=7, days_back=45, max_workers=8,
+                   model_path="models/lstm_model.h5", scaler_path="models/scaler.pkl"):
+    """
+    Forecast rainfall for many locations with one batched LSTM rollout.
+
+    Parameters:
+        locations (pd.DataFrame): Columns ['site', 'lat', 'lon'] (see read_locations)
+        days_to_predict (int): Forecast horizon
+        days_back (int): History window requested per location (30 valid days are needed)
+        max_workers (int): Concurrent history fetches
+
+    Returns:
+        pd.DataFrame: One row per (site, date) with columns
+            ['site', 'lat', 'lon', 'date', 'predicted_rainfall_mm', 'last_observed_date', 'error'];
+            sites whose history could not be fetched get a single row with the error
+    """
+    windows, errors = fetch_windows(locations, days_back, max_workers)
+    ok = [i for i, w in enumerate(windows) if w is not None]
+    print(f"📡 Histories ready for {len(ok)}/{len(locations)} locations")
+
+    predictions_mm = np.empty((0, days_to_predict))
+    if ok:
+        forecaster = get_forecaster(model_path, scaler_path)
+        stacked = np.stack([windows[i]["rainfall_mm"].to_numpy(dtype=float) for i in ok])  # (sites, 30)
+        predictions_mm = forecaster.predict_mm(stacked, days_to_predict)
+
+    # Forecast starts tomorrow, as in generate_forecast
+    future_dates = pd.date_range(start=datetime.now().date() + timedelta(days=1), periods=days_to_predict)
+
+    frames = []
+    for row_index, i in enumerate(ok):
+        site = locations.iloc[i]
+        frames.append(pd.DataFrame({
+            "site": site["site"],
+            "lat": site["lat"],
+            "lon": site["lon"],
+            "date": future_dates,
+            "predicted_rainfall_mm": np.round(predictions_mm[row_index], 2),
+            "last_observed_date": windows[i]["date"].iloc[-1],
+            "error": None
+        }))
+    for i, error in enumerate(errors):
+        if error is not None:
+            site = locations.iloc[i]
+            print(f"⚠️ {site['site']}: {error}")
+            frames.append(pd.DataFrame([{
+                "site": site["site"], "lat": site["lat"], "lon": site["lon"],
+                "date": pd.NaT, "predicted_rainfall_mm": np.nan, "last_observed_date": pd.NaT, "error": error
+            }]))
+
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+        columns=["site", "lat", "lon", "date", "predicted_rainfall_mm", "last_observed_date", "error"])
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Rainfall forecasts for every location in a CSV (columns: site, lat, lon)")
+    ap.add_argument("locations", help="CSV with 'lat' and 'lon' columns (optional 'site')")
+    ap.add_argument("--out", default="outputs/batch_forecast.csv")
+    ap.add_argument("--days", type=int, default=7, help="Forecast horizon in days")
+    ap.add_argument("--days-back", type=int, default=45, help="History window requested from NASA POWER")
+    ap.add_argument("--workers", type=int, default=8, help="Concurrent history fetches")
+    ap.add_argument("--model", default="models/lstm_model.h5")
+    ap.add_argument("--scaler", default="models/scaler.pkl")
+    args = ap.parse_args()
+
+    locations = read_locations(args.locations)
+    forecast = batch_forecast(locations, args.days, args.days_back, args.workers, args.model, args.scaler)
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    forecast.to_csv(args.out, index=False)
+    n_failed = forecast["error"].notna().sum()
+    print(f"✅ Forecasts for {forecast['site'].nunique() - n_failed} sites saved to {args.out}"
+          + (f" ({n_failed} failed)" if n_failed else ""))
+
+
+if __name__ == "__main__":
+    main()
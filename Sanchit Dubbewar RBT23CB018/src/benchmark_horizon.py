@@ -0,0 +1,126 @@
+import argparse
+import json
+import time
+import numpy as np
+from src.predict_live import DIRECT_MODEL_PATH, WINDOW_SIZE, RainfallForecaster
+from src.windowing import SERIES_META_PATH, SERIES_PATH, gather_windows, load_series, train_test_starts
+
+
+def series_targets(series, meta, horizon):
+    """
+    Test windows of the scaled series (same split as training) with the next `horizon`
+    days of rainfall as truth. Windows whose horizon would cross into the next
+    location's segment are left out.
+    """
+    _, test_starts = train_test_starts(meta["segment_lengths"], WINDOW_SIZE, meta["train_fraction"], horizon=horizon)
+    # The forecaster takes rainfall only, the first column
+    return gather_windows(series[:, :1], test_starts, WINDOW_SIZE, horizon=horizon)
+
+
+def horizon_targets(X_test, y_test, horizon):
+    """
+    Windows with a full `horizon` of ground truth from exported X_test/y_test arrays.
+    Assumes consecutive test windows shift by one day, which only holds for a
+    single-location export.
+    """
+    n = len(y_test) - horizon + 1
+    truth = np.stack([y_test[i:i + n] for i in range(horizon)], axis=1)  # (n, horizon)
+    return X_test[:n], truth
+
+
+def to_mm(forecaster, scaled):
+    scaled = np.clip(scaled, 0, 1)
+    return forecaster.scaler.inverse_transform(scaled.reshape(-1, 1)).reshape(scaled.shape)
+
+
+def time_call(fn, runs):
+    """Median seconds per call over `runs` calls (after one warm-up call)."""
+    fn()
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def legacy_forecast(model, window, horizon):
+    """The original loop: one model.predict per day, window rebuilt with np.append."""
+    predictions = []
+    current_input = window.copy()
+    for _ in range(horizon):
+        next_day = model.predict(current_input, verbose=0)[0][0]
+        predictions.append(next_day)
+        current_input = np.append(current_input[:, 1:, :], [[[next_day]]], axis=1)
+    return predictions
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Direct multi-horizon vs recursive LSTM forecasting: latency and accuracy")
+    ap.add_argument("--model", default="models/lstm_model.h5")
+    ap.add_argument("--direct-model", default=DIRECT_MODEL_PATH)
+    ap.add_argument("--scaler", default="models/scaler.pkl")
+    ap.add_argument("--series", default=SERIES_PATH)
+    ap.add_argument("--series-meta", default=SERIES_META_PATH)
+    ap.add_argument("--X-test", default=None,
+                    help="Use exported X_test.npy (preprocessing --export-npy, single location) instead of the series")
+    ap.add_argument("--y-test", default=None, help="y_test.npy to go with --X-test")
+    ap.add_argument("--horizon", type=int, default=7)
+    ap.add_argument("--runs", type=int, default=50, help="Timed calls per latency measurement")
+    ap.add_argument("--legacy-runs", type=int, default=5, help="Timed runs of the original model.predict loop (0 = skip)")
+    ap.add_argument("--json", default=None, help="Also write the results to this JSON file")
+    args = ap.parse_args()
+
+    forecaster = RainfallForecaster(args.model, args.scaler, args.direct_model)
+    if forecaster.direct_horizon < args.horizon:
+        raise SystemExit(f"❌ {args.direct_model} missing or shorter than {args.horizon} days; "
+                         f"train it with: python -m src.lstm_direct_model --horizon {args.horizon}")
+
+    if args.X_test or args.y_test:
+        if not (args.X_test and args.y_test):
+            ap.error("--X-test and --y-test must be given together")
+        X_test = np.load(args.X_test).astype(np.float32)
+        y_test = np.load(args.y_test).astype(np.float32)
+        windows, truth_scaled = horizon_targets(X_test, y_test, args.horizon)
+    else:
+        series, meta = load_series(args.series, args.series_meta)
+        windows, truth_scaled = series_targets(series, meta, args.horizon)
+    truth = to_mm(forecaster, truth_scaled)
+
+    results = {"horizon": args.horizon, "windows": len(windows), "methods": {}}
+    for method in ("recursive", "direct"):
+        predicted = to_mm(forecaster, forecaster.predict_scaled(windows, args.horizon, method))
+        error = predicted - truth
+        single = windows[:1]
+        results["methods"][method] = {
+            "mae_mm": float(np.abs(error).mean()),
+            "rmse_mm": float(np.sqrt((error ** 2).mean())),
+            "mae_by_day_mm": np.abs(error).mean(axis=0).round(4).tolist(),
+            "rmse_by_day_mm": np.sqrt((error ** 2).mean(axis=0)).round(4).tolist(),
+            "latency_single_ms": time_call(lambda: forecaster.predict_scaled(single, args.horizon, method), args.runs) * 1e3,
+            "latency_all_windows_ms": time_call(
+                lambda: forecaster.predict_scaled(windows, args.horizon, method), max(1, args.runs // 10)) * 1e3,
+        }
+    if args.legacy_runs:
+        results["methods"]["recursive_model_predict"] = {
+            "latency_single_ms": time_call(
+                lambda: legacy_forecast(forecaster.model, windows[:1], args.horizon), args.legacy_runs) * 1e3
+        }
+
+    print(f"\n{args.horizon}-day forecasts on {len(windows)} test windows")
+    print(f"{'method':<26} {'MAE mm':>8} {'RMSE mm':>8} {'1 window ms':>12} {'all windows ms':>15}")
+    for method, r in results["methods"].items():
+        mae = f"{r['mae_mm']:.3f}" if "mae_mm" in r else "-"
+        rmse = f"{r['rmse_mm']:.3f}" if "rmse_mm" in r else "-"
+        all_ms = f"{r['latency_all_windows_ms']:.1f}" if "latency_all_windows_ms" in r else "-"
+        print(f"{method:<26} {mae:>8} {rmse:>8} {r['latency_single_ms']:>12.2f} {all_ms:>15}")
+    for method in ("recursive", "direct"):
+        print(f"MAE by day ({method}): {results['methods'][method]['mae_by_day_mm']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import threading
+import time
+import zlib
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+import pandas as pd
+from src.tank_simulation import simulate_tank_batch
+from src.fitness_function import batch_fitness
+from src.ga_optimization import run_ga_optimization
+from src.fetch_live_data_nasa import fetch_rainfall_history
+
+STAGES = ["tank", "fitness", "ga", "predict", "fetch"]
+
+# Problem sizes per stage; every combination is timed
+SCALES = {
+    "quick": {
+        "tank": {"days": [7, 30], "scenarios": [1, 100]},
+        "fitness": {"days": [7], "population": [50, 500]},
+        "ga": {"days": [7], "population": [50], "generations": [100]},
+        "predict": {"days": [7], "windows": [1, 64]},
+        "fetch": {"days_back": [45, 365]},
+    },
+    "full": {
+        "tank": {"days": [7, 30, 365], "scenarios": [1, 100, 10000]},
+        "fitness": {"days": [7, 30], "population": [50, 500, 5000]},
+        "ga": {"days": [7, 30], "population": [50, 500, 5000], "generations": [100]},
+        "predict": {"days": [7, 30], "windows": [1, 64, 1024]},
+        "fetch": {"days_back": [45, 365, 3650]},
+    },
+}
+
+
+def synthetic_rainfall(n_series, days, seed=0, wet_probability=0.4):
+    """Monsoon-like daily rainfall in mm, shape (n_series, days): dry days, gamma-distributed wet days."""
+    rng = np.random.default_rng(seed)
+    wet = rng.random((n_series, days)) < wet_probability
+    return np.where(wet, rng.gamma(0.8, 12.0, (n_series, days)), 0.0).round(2)
+
+
+def synthetic_forecast_df(days, seed=0):
+    """A forecast_df as generate_forecast returns it, for the GA and the tank simulation."""
+    return pd.DataFrame({
+        "date": pd.date_range("2025-07-01", periods=days),
+        "predicted_rainfall_mm": synthetic_rainfall(1, days, seed)[0]
+    })
+
+
+class StandInPowerServer:
+    """
+    Local HTTP server answering NASA POWER daily point requests with synthetic
+    PRECTOTCORR values, so fetch timings don't depend on the network or the real API.
+    Use as a context manager; `url` is the base_url to fetch from, and `spans`
+    lists the (start, end) dates of every request served.
+    """
+
+    def __init__(self, latency_ms=0):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+                start = datetime.strptime(query["start"], "%Y%m%d").date()
+                end = datetime.strptime(query["end"], "%Y%m%d").date()
+                days = (end - start).days + 1
+                seed = zlib.crc32(f"{query['latitude']},{query['longitude']},{start}".encode())
+                values = synthetic_rainfall(1, days, seed)[0]
+                body = json.dumps({"properties": {"parameter": {"PRECTOTCORR": {
+                    (start + timedelta(days=i)).strftime("%Y%m%d"): float(v) for i, v in enumerate(values)
+                }}}}).encode()
+                time.sleep(latency_ms / 1000)
+                server.requests += 1
+                server.spans.append((start, end))
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.requests = 0
+        self.spans = []
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._httpd.server_port}/api/temporal/daily/point"
+
+    def __enter__(self):
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def measure(fn, repeats, setup=None, warmup=1):
+    """Timing stats in ms over `repeats` calls of fn, after `warmup` untimed calls. setup() runs untimed before each call."""
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+    times = []
+    for _ in range(repeats):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1e3)
+    return {
+        "repeats": repeats,
+        "min_ms": round(min(times), 4),
+        "median_ms": round(float(np.median(times)), 4),
+        "mean_ms": round(float(np.mean(times)), 4),
+        "max_ms": round(max(times), 4),
+    }
+
+
+def result(stage, params, stats, **extra):
+    name = stage + "[" + ",".join(f"{k}={v}" for k, v in params.items()) + "]"
+    return {"name": name, "stage": stage, "params": params, **stats, **extra}
+
+
+def grid(sizes):
+    """Every combination of a {param: [values]} dict, as a list of {param: value} dicts."""
+    combos = [{}]
+    for key, values in sizes.items():
+        combos = [{**c, key: v} for c in combos for v in values]
+    return combos
+
+
+def bench_tank(sizes, repeats, seed, **_):
+    results = []
+    for p in grid(sizes):
+        rng = np.random.default_rng(seed)
+        rainfall = synthetic_rainfall(p["scenarios"], p["days"], seed)
+        usage = rng.uniform(300, 800, (p["scenarios"], p["days"]))
+        capacity = rng.uniform(1000, 10000, p["scenarios"])
+        stats = measure(lambda: simulate_tank_batch(rainfall, usage, 100, 0.85, capacity, 1500), repeats)
+        results.append(result("tank", p, stats))
+    return results
+
+
+def bench_fitness(sizes, repeats, seed, **_):
+    results = []
+    for p in grid(sizes):
+        rainfall = synthetic_rainfall(1, p["days"], seed)[0]
+        plans = np.random.default_rng(seed).uniform(300, 800, (p["population"], p["days"]))
+        stats = measure(lambda: batch_fitness(plans, rainfall, 100, 0.85, 3000, 1500), repeats)
+        results.append(result("fitness", p, stats))
+    return results
+
+
+def bench_ga(sizes, repeats, seed, **_):
+    results = []
+    for p in grid(sizes):
+        forecast_df = synthetic_forecast_df(p["days"], seed)
+        stats = measure(lambda: run_ga_optimization(
+            forecast_df, population_size=p["population"], generations=p["generations"], seed=seed, save=False
+        ), repeats)
+        results.append(result("ga", p, stats))
+    return results
+
+
+def bench_predict(sizes, repeats, seed, model_path, scaler_path, **_):
+    # TensorFlow is only needed for this stage
+    from src.predict_live import RainfallForecaster, WINDOW_SIZE
+
+    start = time.perf_counter()
+    forecaster = RainfallForecaster(model_path, scaler_path)
+    results = [result("predict_load", {}, {"repeats": 1, "median_ms": round((time.perf_counter() - start) * 1e3, 4)})]
+    for p in grid(sizes):
+        windows = synthetic_rainfall(p["windows"], WINDOW_SIZE, seed)
+        stats = measure(lambda: forecaster.predict_mm(windows, p["days"]), repeats)
+        results.append(result("predict", p, stats))
+    return results
+
+
+def bench_fetch(sizes, repeats, seed, nasa_latency_ms=0, **_):
+    results = []
+    end_date = date(2025, 6, 30)
+    with StandInPowerServer(nasa_latency_ms) as server, tempfile.TemporaryDirectory() as tmp:
+        cache_path = os.path.join(tmp, "nasa_power.sqlite")
+
+        def clear_cache():
+            if os.path.exists(cache_path):
+                os.remove(cache_path)
+
+        for p in grid(sizes):
+            start_date = end_date - timedelta(days=p["days_back"] - 1)
+
+            def fetch():
+                return fetch_rainfall_history(18.54, 73.85, start_date, end_date, cache_path, server.url)
+
+            before = server.requests
+            stats = measure(fetch, repeats, setup=clear_cache)
+            cold_requests = (server.requests - before) / (repeats + 1)
+            results.append(result("fetch_cold", p, stats, requests_per_call=cold_requests))
+
+            before = server.requests
+            stats = measure(fetch, repeats)
+            results.append(result("fetch_cached", p, stats, requests_per_call=(server.requests - before) / (repeats + 1)))
+    return results
+
+
+BENCHMARKS = {"tank": bench_tank, "fitness": bench_fitness, "ga": bench_ga, "predict": bench_predict, "fetch": bench_fetch}
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmarks(stages=STAGES, scale="full", repeats=5, seed=0, model_path="models/lstm_model.h5",
+                   scaler_path="models/scaler.pkl", nasa_latency_ms=0):
+    """
+    Times each stage at the problem sizes of SCALES[scale].
+
+    Runs in a temporary working directory (the GA writes outputs/*.csv) with stage
+    output silenced. A stage whose dependencies are missing (e.g. TensorFlow or the
+    model for 'predict') is recorded in 'skipped' instead of failing the run.
+
+    Returns:
+        dict: {'meta': {...}, 'results': [{'name', 'stage', 'params', 'median_ms', ...}], 'skipped': {stage: reason}}
+    """
+    kwargs = dict(seed=seed, model_path=os.path.abspath(model_path), scaler_path=os.path.abspath(scaler_path),
+                  nasa_latency_ms=nasa_latency_ms)
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "scale": scale,
+            "repeats": repeats,
+            "seed": seed,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": [],
+        "skipped": {},
+    }
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            for stage in stages:
+                print(f"⏱️ {stage}...", flush=True)
+                try:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        results = BENCHMARKS[stage](SCALES[scale][stage], repeats, **kwargs)
+                except (ImportError, FileNotFoundError) as e:
+                    report["skipped"][stage] = str(e)
+                    print(f"⚠️ Skipped {stage}: {e}")
+                    continue
+                for r in results:
+                    print(f"   {r['name']:<50} {r['median_ms']:>12.3f} ms")
+                report["results"].extend(results)
+        finally:
+            os.chdir(cwd)
+
+    if "predict" in stages and "predict" not in report["skipped"]:
+        import tensorflow as tf
+        report["meta"]["tensorflow"] = tf.__version__
+    return report
+
+
+def compare(report, baseline, threshold=1.25, min_ms=1.0):
+    """
+    Time ratio (current / baseline) for every benchmark present in both reports, on the
+    fastest of the repeats (least affected by background load; median if no min was recorded).
+    A ratio above `threshold` is a regression; timings below `min_ms` in both runs are
+    too noisy to judge and are never flagged.
+
+    Returns:
+        list: (name, baseline_ms, current_ms, ratio, regressed) tuples
+    """
+    base = {r["name"]: r for r in baseline["results"]}
+    rows = []
+    for r in report["results"]:
+        if r["name"] not in base:
+            continue
+        field = "min_ms" if "min_ms" in r and "min_ms" in base[r["name"]] else "median_ms"
+        before, now = base[r["name"]][field], r[field]
+        ratio = now / before if before > 0 else float("inf")
+        regressed = ratio > threshold and max(before, now) >= min_ms
+        rows.append((r["name"], before, now, ratio, regressed))
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the tank simulation, fitness, GA, LSTM forecast and NASA fetch stages")
+    ap.add_argument("--stages", default=",".join(STAGES), help=f"Comma-separated subset of {','.join(STAGES)}")
+    ap.add_argument("--scale", choices=sorted(SCALES), default="full")
+    ap.add_argument("--repeats", type=int, default=5, help="Timed calls per benchmark (after one warm-up call)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--model", default="models/lstm_model.h5")
+    ap.add_argument("--scaler", default="models/scaler.pkl")
+    ap.add_argument("--nasa-latency-ms", type=float, default=0, help="Simulated response delay of the stand-in NASA server")
+    ap.add_argument("--json", default=None, help="Results file (default: outputs/benchmarks/benchmark_<commit>.json)")
+    ap.add_argument("--compare", default=None, help="Baseline JSON from an earlier run; exit 1 on regressions")
+    ap.add_argument("--threshold", type=float, default=1.25, help="Time ratio (current / baseline) counted as a regression")
+    args = ap.parse_args()
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        ap.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    report = run_benchmarks(stages, args.scale, args.repeats, args.seed, args.model, args.scaler, args.nasa_latency_ms)
+
+    path = args.json or os.path.join("outputs", "benchmarks", f"benchmark_{(report['meta']['commit'] or 'local')[:7]}.json")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results saved to {path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare(report, baseline, args.threshold)
+        print(f"\nCompared with {args.compare} (commit {baseline['meta'].get('commit')})")
+        print(f"{'benchmark':<50} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}")
+        for name, before, now, ratio, regressed in rows:
+            print(f"{name:<50} {before:>12.3f} {now:>12.3f} {ratio:>7.2f}{'  ❌ REGRESSION' if regressed else ''}")
+        regressions = [row for row in rows if row[4]]
+        if regressions:
+            raise SystemExit(f"❌ {len(regressions)} benchmark(s) slower than {args.threshold}x the baseline")
+        print("✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
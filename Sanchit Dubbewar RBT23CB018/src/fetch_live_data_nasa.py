@@ -1,18 +1,186 @@
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timedelta, timezone
+import sqlite3
+import threading
 import os
 
-def fetch_live_data(lat=18.54, lon=73.85, days_back=45):
+NASA_POWER_URL = os.getenv("NASA_POWER_URL", "https://power.larc.nasa.gov/api/temporal/daily/point")
+CACHE_PATH = os.getenv("NASA_POWER_CACHE", "data/cache/nasa_power.sqlite")
+# A location fetched this recently is served from cache even if its newest days are
+# still missing (NASA POWER publishes with a lag of a few days)
+CACHE_MAX_AGE_HOURS = float(os.getenv("NASA_POWER_CACHE_MAX_AGE_HOURS", "6"))
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Shared requests.Session with connection pooling and retry/backoff on transient errors."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=4,
+                backoff_factor=1.0,  # 1s, 2s, 4s, 8s
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["GET"],
+                respect_retry_after_header=True
+            )
+            adapter = HTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=16)
+            _session = requests.Session()
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def location_key(lat, lon):
+    # NASA POWER's grid is far coarser than 1e-4 degrees
+    return round(float(lat), 4), round(float(lon), 4)
+
+
+def open_cache(path=CACHE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS rainfall (
+            lat REAL, lon REAL, date TEXT, rainfall_mm REAL,
+            PRIMARY KEY (lat, lon, date)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS fetch_log (
+            lat REAL, lon REAL, fetched_at TEXT, start_date TEXT, end_date TEXT,
+            PRIMARY KEY (lat, lon)
+        )
+    """)
+    return conn
+
+
+def read_cached(conn, lat, lon, start_date, end_date):
+    """Cached valid daily values for the location in [start_date, end_date]."""
+    rows = conn.execute(
+        "SELECT date, rainfall_mm FROM rainfall WHERE lat = ? AND lon = ? AND date BETWEEN ? AND ? ORDER BY date",
+        (*location_key(lat, lon), start_date.isoformat(), end_date.isoformat())
+    ).fetchall()
+    return pd.DataFrame(rows, columns=["date", "rainfall_mm"])
+
+
+def is_fresh(conn, lat, lon, start_date, end_date, max_age_hours=CACHE_MAX_AGE_HOURS):
+    """True if [start_date, end_date] was fully fetched for this location within the last `max_age_hours`."""
+    row = conn.execute(
+        "SELECT fetched_at, start_date, end_date FROM fetch_log WHERE lat = ? AND lon = ?", location_key(lat, lon)
+    ).fetchone()
+    if row is None:
+        return False
+    age = datetime.now(timezone.utc) - datetime.fromisoformat(row[0])
+    covered = row[1] <= start_date.isoformat() and row[2] >= end_date.isoformat()
+    return covered and age < timedelta(hours=max_age_hours)
+
+
+def request_power_data(lat, lon, start_date, end_date, base_url=NASA_POWER_URL):
+    """Daily PRECTOTCORR for [start_date, end_date] from the NASA POWER API, as {date: mm} (-999 = missing)."""
+    params = {
+        "start": start_date.strftime("%Y%m%d"),
+        "end": end_date.strftime("%Y%m%d"),
+        "latitude": lat,
+        "longitude": lon,
+        "community": "ag",
+        "parameters": "PRECTOTCORR",
+        "format": "JSON"
+    }
+    try:
+        response = get_session().get(base_url, params=params, timeout=30)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        raise Exception(f"❌ NASA API request failed: {e}")
+
+    data = response.json()
+    return data["properties"]["parameter"]["PRECTOTCORR"]
+
+
+def update_cache(conn, lat, lon, daily_data, start_date, end_date):
+    """Stores the valid values of an API response and records [start_date, end_date] as fetched."""
+    key = location_key(lat, lon)
+    rows = [
+        (*key, datetime.strptime(d, "%Y%m%d").date().isoformat(), float(v))
+        for d, v in daily_data.items() if v != -999.0
+    ]
+    with conn:
+        conn.executemany("INSERT OR REPLACE INTO rainfall VALUES (?, ?, ?, ?)", rows)
+        conn.execute(
+            "INSERT OR REPLACE INTO fetch_log VALUES (?, ?, ?, ?, ?)",
+            (*key, datetime.now(timezone.utc).isoformat(), start_date.isoformat(), end_date.isoformat())
+        )
+
+
+def missing_spans(dates):
+    """Groups sorted dates into contiguous (first, last) runs."""
+    spans = []
+    for d in dates:
+        if spans and d - spans[-1][1] == timedelta(days=1):
+            spans[-1][1] = d
+        else:
+            spans.append([d, d])
+    return [tuple(span) for span in spans]
+
+
+def fetch_rainfall_history(lat, lon, start_date, end_date, cache_path=CACHE_PATH, base_url=NASA_POWER_URL,
+                           max_age_hours=CACHE_MAX_AGE_HOURS):
+    """
+    Valid daily rainfall for [start_date, end_date], served from the local cache where
+    possible. Only the runs of dates missing from the cache are requested from NASA POWER,
+    and nothing is requested when the location was fetched recently.
+
+    Returns:
+        tuple: (pd.DataFrame with ['date', 'rainfall_mm'], number of API requests made)
+    """
+    conn = open_cache(cache_path)
+    try:
+        cached = read_cached(conn, lat, lon, start_date, end_date)
+        have = set(cached["date"])
+        missing = [
+            start_date + timedelta(days=i)
+            for i in range((end_date - start_date).days + 1)
+            if (start_date + timedelta(days=i)).isoformat() not in have
+        ]
+
+        requests_made = 0
+        if missing and not is_fresh(conn, lat, lon, start_date, end_date, max_age_hours):
+            print(f"🌐 Fetching {len(missing)} missing days ({len(cached)} of "
+                  f"{(end_date - start_date).days + 1} days already cached)")
+            daily_data = {}
+            for first, last in missing_spans(missing):
+                daily_data.update(request_power_data(lat, lon, first, last, base_url))
+                requests_made += 1
+            # Everything in the window is now either cached or known to be unavailable
+            update_cache(conn, lat, lon, daily_data, start_date, end_date)
+            cached = read_cached(conn, lat, lon, start_date, end_date)
+        else:
+            print(f"💾 Using cached NASA POWER data ({len(cached)} days)")
+    finally:
+        conn.close()
+
+    cached["date"] = pd.to_datetime(cached["date"])
+    return cached, requests_made
+
+
+def fetch_live_data(lat=18.54, lon=73.85, days_back=45, use_cache=True):
     """
     Fetch live NASA POWER rainfall data for the last `days_back` days (including today).
     We fetch 45 days to ensure we have at least 30 valid days after filtering out -999 values.
     The LSTM model requires 30 days of historical data for predictions.
 
+    Daily values are cached per location (CACHE_PATH), so repeated calls only download
+    the days not seen before, or nothing at all if the location was fetched recently.
+
     Parameters:
         lat (float): Latitude of location (default: Mumbai)
         lon (float): Longitude of location (default: Mumbai)
         days_back (int): Number of days of recent data to fetch (default: 45 to ensure 30+ valid days)
+        use_cache (bool): Set False to bypass the cache and always download the full window
 
     Returns:
         pd.DataFrame: DataFrame with columns ['date', 'rainfall_mm']
@@ -29,32 +197,14 @@ def fetch_live_data(lat=18.54, lon=73.85, days_back=45):
     print(f"📍 Location: {lat}°N, {lon}°E")
     print(f"🎯 Target: Need at least 30 valid days for LSTM model")
 
-    # NASA POWER endpoint
-    url = (
-        f"https://power.larc.nasa.gov/api/temporal/daily/point"
-        f"?start={start_str}&end={end_str}"
-        f"&latitude={lat}&longitude={lon}"
-        f"&community=ag&parameters=PRECTOTCORR"
-        f"&format=JSON"
-    )
-
-    try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"❌ NASA API request failed: {e}")
-
-    data = response.json()
-
-    # Extract dates and rainfall in mm/day
-    daily_data = data["properties"]["parameter"]["PRECTOTCORR"]
-    dates = list(daily_data.keys())
-    rainfall_mm = list(daily_data.values())
-
-    df = pd.DataFrame({
-        "date": pd.to_datetime(dates),
-        "rainfall_mm": rainfall_mm
-    })
+    if use_cache:
+        df, _ = fetch_rainfall_history(lat, lon, start_date, end_date)
+    else:
+        daily_data = request_power_data(lat, lon, start_date, end_date)
+        df = pd.DataFrame({
+            "date": pd.to_datetime(list(daily_data.keys())),
+            "rainfall_mm": list(daily_data.values())
+        })
 
     # Remove invalid entries (-999 values) and sort by date
     df = df[df["rainfall_mm"] != -999.0].sort_values("date").reset_index(drop=True)
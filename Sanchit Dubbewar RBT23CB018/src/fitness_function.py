@@ -1,4 +1,29 @@
 import numpy as np
+from src.tank_simulation import simulate_tank_batch
+
+OVERFLOW_PENALTY = 2
+SHORTAGE_PENALTY = 5
+
+
+def batch_fitness(usage_plans, rainfall_mm, catchment_area_m2, runoff_coefficient, tank_capacity_liters, initial_storage_liters):
+    """
+    Fitness scores for many usage plans in one vectorized pass.
+
+    usage_plans: array of shape (..., days), e.g. (population_size, 7)
+    rainfall_mm: forecast rainfall of shape (days,), or (..., days) for several scenarios
+    Tank parameters may be scalars or arrays broadcastable against the leading axes.
+
+    Returns an array of scores with the leading (broadcast) shape.
+    """
+    sim = simulate_tank_batch(
+        rainfall_mm, usage_plans,
+        catchment_area_m2, runoff_coefficient,
+        tank_capacity_liters, initial_storage_liters,
+        net_daily_balance=True
+    )
+    penalty = OVERFLOW_PENALTY * sim.overflow.sum(axis=-1) + SHORTAGE_PENALTY * sim.shortage.sum(axis=-1)
+    return 1000 - penalty
+
 
 def fitness_function(usage_plan, forecast_df, catchment_area_m2, runoff_coefficient, tank_capacity_liters, initial_storage_liters):
     """
@@ -6,28 +31,10 @@ def fitness_function(usage_plan, forecast_df, catchment_area_m2, runoff_coeffici
 
     usage_plan: list of daily usage in liters (length = 7)
     """
-    storage = initial_storage_liters
-    overflow_penalty = 0
-    shortage_penalty = 0
-
-    for day, usage in enumerate(usage_plan):
-        # Rainwater collected
-        rainfall_mm = forecast_df.iloc[day]["predicted_rainfall_mm"]
-        inflow_liters = rainfall_mm * catchment_area_m2 * runoff_coefficient
-
-        # Update storage
-        storage += inflow_liters
-        storage -= usage
-
-        # Penalties
-        if storage > tank_capacity_liters:
-            overflow_penalty += (storage - tank_capacity_liters) * 2
-            storage = tank_capacity_liters
-
-        if storage < 0:
-            shortage_penalty += abs(storage) * 5
-            storage = 0
-
-    # Base score
-    score = 1000 - (overflow_penalty + shortage_penalty)
-    return score
+    rainfall_mm = forecast_df["predicted_rainfall_mm"].to_numpy(dtype=float)[:len(usage_plan)]
+    score = batch_fitness(
+        np.asarray(usage_plan, dtype=float), rainfall_mm,
+        catchment_area_m2, runoff_coefficient,
+        tank_capacity_liters, initial_storage_liters
+    )
+    return float(score)
@@ -1,9 +1,60 @@
 import pandas as pd
 import numpy as np
-import random
-from src.fitness_function import fitness_function
+from concurrent.futures import ProcessPoolExecutor
+from src.fitness_function import batch_fitness
 import os
 
+
+def evolve_population(population, scores, rng, usage_min, usage_max, mutation_rate, elite_size):
+    """
+    One GA generation on a (population_size, days) array.
+
+    Keeps the `elite_size` best plans unchanged, then fills the rest of the population
+    with children of random parent pairs from the top 50%: single-point crossover,
+    and with probability `mutation_rate` one day of a child is re-drawn uniformly.
+    """
+    population_size, days = population.shape
+    order = np.argsort(-scores, kind="stable")
+    elite = population[order[:elite_size]]
+
+    # Selection (top 50%)
+    selected = population[order[:max(2, population_size // 2)]]
+    n_selected = len(selected)
+
+    n_children = population_size - len(elite)
+    n_pairs = (n_children + 1) // 2
+    # Two distinct parents per pair
+    first = rng.integers(0, n_selected, n_pairs)
+    second = (first + rng.integers(1, n_selected, n_pairs)) % n_selected
+    parent1, parent2 = selected[first], selected[second]
+
+    # Single point crossover
+    if days > 1:
+        points = rng.integers(1, days, n_pairs)
+        head = np.arange(days) < points[:, None]
+        child1 = np.where(head, parent1, parent2)
+        child2 = np.where(head, parent2, parent1)
+    else:
+        child1, child2 = parent1.copy(), parent2.copy()
+    children = np.concatenate([child1, child2])[:n_children]
+
+    # Mutation: randomly tweak one day's usage
+    mutants = np.flatnonzero(rng.random(n_children) < mutation_rate)
+    children[mutants, rng.integers(0, days, len(mutants))] = rng.uniform(usage_min, usage_max, len(mutants))
+
+    return np.concatenate([elite, children])
+
+
+def _evolve_island(args):
+    """Runs `generations` generations on one island (process pool worker)."""
+    population, rng, generations, fitness_args, ga_args = args
+    for _ in range(generations):
+        scores = batch_fitness(population, *fitness_args)
+        population = evolve_population(population, scores, rng, *ga_args)
+    scores = batch_fitness(population, *fitness_args)
+    return population, scores, rng
+
+
 def run_ga_optimization(
     forecast_df,
     catchment_area_m2=100,
@@ -14,100 +65,154 @@ def run_ga_optimization(
     usage_max=800,
     population_size=50,
     generations=100,
-    mutation_rate=0.1
+    mutation_rate=0.1,
+    seed=None,
+    elite_size=2,
+    patience=None,
+    tolerance=1e-6,
+    n_islands=1,
+    migration_interval=10,
+    migration_size=2,
+    n_jobs=None,
+    save=True
 ):
     """
     Run Genetic Algorithm optimization on forecasted rainfall data.
 
+    The population is a (population_size, days) array scored with one batch_fitness
+    call per generation.
+
     Parameters:
         forecast_df (pd.DataFrame): Must have columns ['date', 'predicted_rainfall_mm']
         catchment_area_m2, runoff_coefficient, tank_capacity_liters, initial_storage_liters: tank parameters
         usage_min, usage_max: daily usage constraints in liters
         population_size, generations, mutation_rate: GA settings
+        seed (int): Seed for reproducible runs (None = random)
+        elite_size (int): Best plans copied unchanged into the next generation
+        patience (int): Stop early once the best score has improved by less than
+            `tolerance` for this many generations (None = always run all generations).
+            With islands this is checked after each migration, on the best of all islands.
+        n_islands (int): Split the population into this many islands evolved in a
+            process pool, exchanging their `migration_size` best plans (ring topology)
+            every `migration_interval` generations. Worth it for large populations only.
+            The islands together hold `population_size` plans (at least 4 each).
+        n_jobs (int): Worker processes for the island model (default: one per island, up to the CPU count)
+        save (bool): Write outputs/optimized_plan.csv and outputs/final_plan.csv
 
     Returns:
         tuple: (optimized_usage_df, merged_df)
     """
 
-    # Ensure output directory
-    os.makedirs("outputs", exist_ok=True)
-
-    def create_individual():
-        """Random usage plan for 7 days."""
-        return [random.uniform(usage_min, usage_max) for _ in range(len(forecast_df))]
-
-    def mutate(individual):
-        """Randomly tweak a day's usage."""
-        day = random.randint(0, len(individual)-1)
-        individual[day] = random.uniform(usage_min, usage_max)
-        return individual
-
-    def crossover(parent1, parent2):
-        """Single point crossover."""
-        point = random.randint(1, len(parent1)-1)
-        child1 = parent1[:point] + parent2[point:]
-        child2 = parent2[:point] + parent1[point:]
-        return child1, child2
-
-    # Initialize population
-    population = [create_individual() for _ in range(population_size)]
-
-    for gen in range(generations):
-        # Evaluate fitness
-        scores = [
-            (
-                fitness_function(
-                    ind, forecast_df,
-                    catchment_area_m2, runoff_coefficient,
-                    tank_capacity_liters, initial_storage_liters
-                ),
-                ind
-            )
-            for ind in population
-        ]
-        scores.sort(reverse=True, key=lambda x: x[0])
-        best_score, best_individual = scores[0]
-
-        if gen % 10 == 0:
-            print(f"Generation {gen}: Best Score = {best_score:.2f}")
-
-        # Selection (top 50%)
-        selected = [ind for _, ind in scores[:population_size // 2]]
-
-        # Crossover & Mutation
-        children = []
-        while len(children) < population_size:
-            parent1, parent2 = random.sample(selected, 2)
-            child1, child2 = crossover(parent1, parent2)
-            if random.random() < mutation_rate:
-                child1 = mutate(child1)
-            if random.random() < mutation_rate:
-                child2 = mutate(child2)
-            children.extend([child1, child2])
-
-        population = children
+    rng = np.random.default_rng(seed)
+    rainfall_mm = forecast_df["predicted_rainfall_mm"].to_numpy(dtype=float)
+    days = len(rainfall_mm)
+    fitness_args = (rainfall_mm, catchment_area_m2, runoff_coefficient, tank_capacity_liters, initial_storage_liters)
+    ga_args = (usage_min, usage_max, mutation_rate, elite_size)
+
+    if n_islands > 1:
+        population, scores = _run_islands(
+            seed, population_size, days, generations, fitness_args, ga_args,
+            n_islands, migration_interval, migration_size, n_jobs, patience, tolerance
+        )
+    else:
+        # Initialize population: random usage plans
+        population = rng.uniform(usage_min, usage_max, (population_size, days))
+        best_so_far = -np.inf
+        stale = 0
+
+        for gen in range(generations):
+            # Evaluate fitness
+            scores = batch_fitness(population, *fitness_args)
+            best_score = scores.max()
+
+            if gen % 10 == 0:
+                print(f"Generation {gen}: Best Score = {best_score:.2f}")
+
+            # Early stopping on convergence
+            if best_score > best_so_far + tolerance:
+                best_so_far, stale = best_score, 0
+            else:
+                stale += 1
+            if patience is not None and stale >= patience:
+                print(f"Converged at generation {gen} (no improvement for {patience} generations)")
+                break
+
+            population = evolve_population(population, scores, rng, *ga_args)
+        else:
+            scores = batch_fitness(population, *fitness_args)
 
     # Final best plan
-    final_score, final_plan = scores[0]
+    best = int(np.argmax(scores))
+    final_score, final_plan = scores[best], population[best]
     print("\n✅ Optimization complete")
     print(f"Best Score: {final_score:.2f}")
-    print("Best Plan (liters/day):", [round(x, 2) for x in final_plan])
+    print("Best Plan (liters/day):", [round(x, 2) for x in final_plan.tolist()])
 
     # Save optimized plan
     optimized_df = pd.DataFrame({
         "date": forecast_df["date"],
-        "usage_liters": [round(x, 2) for x in final_plan]
+        "usage_liters": np.round(final_plan, 2)
     })
-    optimized_df.to_csv("outputs/optimized_plan.csv", index=False)
 
     # Merge with forecast
     merged_df = forecast_df.copy()
     merged_df["optimized_usage_liters"] = optimized_df["usage_liters"]
-    merged_df.to_csv("outputs/final_plan.csv", index=False)
+
+    if save:
+        os.makedirs("outputs", exist_ok=True)
+        optimized_df.to_csv("outputs/optimized_plan.csv", index=False)
+        merged_df.to_csv("outputs/final_plan.csv", index=False)
 
     return optimized_df, merged_df
 
 
+def _run_islands(seed, population_size, days, generations, fitness_args, ga_args,
+                 n_islands, migration_interval, migration_size, n_jobs, patience, tolerance):
+    """Island model: returns the final (population, scores) of all islands stacked."""
+    if population_size < 4 * n_islands:
+        raise ValueError(f"population_size={population_size} is too small for {n_islands} islands "
+                         f"(need at least 4 plans per island)")
+    usage_min, usage_max = ga_args[:2]
+    # Spread the remainder so the islands add up to population_size
+    sizes = [population_size // n_islands + (i < population_size % n_islands) for i in range(n_islands)]
+    rngs = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(n_islands)]
+    islands = [r.uniform(usage_min, usage_max, (size, days)) for r, size in zip(rngs, sizes)]
+    n_jobs = n_jobs or min(n_islands, os.cpu_count() or 1)
+    best_so_far = -np.inf
+    stale = 0
+
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        done = 0
+        while done < generations:
+            epoch = min(migration_interval, generations - done)
+            jobs = [(islands[i], rngs[i], epoch, fitness_args, ga_args) for i in range(n_islands)]
+            results = list(pool.map(_evolve_island, jobs))
+            islands = [pop for pop, _, _ in results]
+            scores = [s for _, s, _ in results]
+            rngs = [r for _, _, r in results]
+            done += epoch
+            best_score = max(s.max() for s in scores)
+            print(f"Generation {done}: Best Score = {best_score:.2f} ({n_islands} islands)")
+
+            # Early stopping on convergence, at migration granularity
+            if best_score > best_so_far + tolerance:
+                best_so_far, stale = best_score, 0
+            else:
+                stale += epoch
+            if patience is not None and stale >= patience:
+                print(f"Converged at generation {done} (no improvement for {stale} generations)")
+                break
+
+            # Ring migration: each island's best replace the next island's worst
+            migrants = [pop[np.argsort(-s, kind="stable")[:migration_size]] for pop, s in zip(islands, scores)]
+            for i in range(n_islands):
+                worst = np.argsort(scores[i], kind="stable")[:migration_size]
+                islands[i][worst] = migrants[i - 1]
+                scores[i][worst] = batch_fitness(migrants[i - 1], *fitness_args)
+
+    return np.concatenate(islands), np.concatenate(scores)
+
+
 if __name__ == "__main__":
     # Standalone run
     forecast_df = pd.read_csv("outputs/predictions_next_7_days_on_NASA_data.csv", parse_dates=["date"])
@@ -0,0 +1,59 @@
+import argparse
+from tensorflow.keras.callbacks import EarlyStopping
+import matplotlib.pyplot as plt
+from src.lstm_model import build_model
+from src.predict_live import DIRECT_MODEL_PATH
+from src.windowing import load_series, train_test_starts, window_dataset
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Train an LSTM that predicts the whole N-day horizon in one forward pass")
+    ap.add_argument("--horizon", type=int, default=7, help="Days predicted per window")
+    ap.add_argument("--window-size", type=int, default=30)
+    ap.add_argument("--epochs", type=int, default=50)
+    ap.add_argument("--batch-size", type=int, default=64)
+    ap.add_argument("--out", default=DIRECT_MODEL_PATH)
+    ap.add_argument("--no-plot", action="store_true")
+    args = ap.parse_args()
+
+    # Same scaled series and split as lstm_model.py; each target is the next `horizon` days
+    series, meta = load_series()
+    train_starts, test_starts = train_test_starts(
+        meta["segment_lengths"], args.window_size, meta["train_fraction"], horizon=args.horizon
+    )
+    train_ds = window_dataset(series, train_starts, args.window_size, args.batch_size,
+                              shuffle=True, seed=42, horizon=args.horizon)
+    val_ds = window_dataset(series, test_starts, args.window_size, args.batch_size, horizon=args.horizon)
+    print(f"Training {args.horizon}-day direct model on {len(train_starts)} windows, validating on {len(test_starts)}")
+
+    # Same architecture, with one output per forecast day
+    model = build_model(args.window_size, series.shape[1], outputs=args.horizon)
+    model.compile(optimizer='adam', loss='mean_squared_error')
+
+    # Early stopping to prevent overfitting
+    early_stop = EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True)
+
+    history = model.fit(
+        train_ds,
+        epochs=args.epochs,
+        validation_data=val_ds,
+        callbacks=[early_stop]
+    )
+
+    # Save the trained model
+    model.save(args.out)
+    print(f"✅ Direct {args.horizon}-day model saved to {args.out}")
+
+    if not args.no_plot:
+        # Plot training and validation loss
+        plt.plot(history.history['loss'], label='Train Loss')
+        plt.plot(history.history['val_loss'], label='Val Loss')
+        plt.xlabel("Epoch")
+        plt.ylabel("Loss")
+        plt.title(f"Direct {args.horizon}-Day Model: Training Loss vs Validation Loss")
+        plt.legend()
+        plt.show()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,46 +1,78 @@
-import numpy as np
+import argparse
 from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout
+from tensorflow.keras.layers import Input, LSTM, Dense, Dropout
 from tensorflow.keras.callbacks import EarlyStopping
 import matplotlib.pyplot as plt
+from src.predict_live import WINDOW_SIZE
+from src.windowing import load_series, train_test_starts, window_dataset
 
-# Load preprocessed arrays
-X_train = np.load("data/processed/X_train.npy")
-y_train = np.load("data/processed/y_train.npy")
-X_test = np.load("data/processed/X_test.npy")
-y_test = np.load("data/processed/y_test.npy")
-
-# Build the LSTM model
-model = Sequential()
-model.add(LSTM(64, return_sequences=True, input_shape=(30, 1)))
-model.add(Dropout(0.2))
-model.add(LSTM(32))
-model.add(Dropout(0.2))
-model.add(Dense(1))
-
-# Compile the model
-model.compile(optimizer='adam', loss='mean_squared_error')
-
-# Early stopping to prevent overfitting
-early_stop = EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True)
-
-# Train the model
-history = model.fit(
-    X_train, y_train,
-    epochs=50,
-    batch_size=64,
-    validation_data=(X_test, y_test),
-    callbacks=[early_stop]
-)
-
-# Save the trained model
-model.save("models/lstm_model.h5")
-
-# Plot training and validation loss
-plt.plot(history.history['loss'], label='Train Loss')
-plt.plot(history.history['val_loss'], label='Val Loss')
-plt.xlabel("Epoch")
-plt.ylabel("Loss")
-plt.title("Training Loss vs Validation Loss")
-plt.legend()
-plt.show()
+# RainfallForecaster loads this path and feeds it (batch, WINDOW_SIZE, 1) windows
+DEFAULT_MODEL_PATH = "models/lstm_model.h5"
+
+
+def build_model(window_size=30, n_features=1, outputs=1):
+    """Two-layer LSTM; `outputs` is the number of days predicted per window."""
+    model = Sequential()
+    model.add(Input(shape=(window_size, n_features)))
+    model.add(LSTM(64, return_sequences=True))
+    model.add(Dropout(0.2))
+    model.add(LSTM(32))
+    model.add(Dropout(0.2))
+    model.add(Dense(outputs))
+    return model
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Train the rainfall LSTM from the scaled series (see preprocessing.py)")
+    ap.add_argument("--window-size", type=int, default=30)
+    ap.add_argument("--epochs", type=int, default=50)
+    ap.add_argument("--batch-size", type=int, default=64)
+    ap.add_argument("--out", default=DEFAULT_MODEL_PATH)
+    ap.add_argument("--no-plot", action="store_true")
+    args = ap.parse_args()
+
+    # Memory-mapped series; windows are cut from it batch by batch
+    series, meta = load_series()
+    input_shape = (args.window_size, series.shape[1])
+    if args.out == DEFAULT_MODEL_PATH and input_shape != (WINDOW_SIZE, 1):
+        ap.error(f"a model with input shape {input_shape} can't be used by the forecaster, which expects "
+                 f"({WINDOW_SIZE}, 1); pass --out to save it somewhere other than {DEFAULT_MODEL_PATH}")
+    train_starts, test_starts = train_test_starts(meta["segment_lengths"], args.window_size, meta["train_fraction"])
+    train_ds = window_dataset(series, train_starts, args.window_size, args.batch_size, shuffle=True, seed=42)
+    val_ds = window_dataset(series, test_starts, args.window_size, args.batch_size)
+    print(f"Training on {len(train_starts)} windows, validating on {len(test_starts)} "
+          f"(features: {', '.join(meta['features'])})")
+
+    # Build the LSTM model
+    model = build_model(args.window_size, series.shape[1])
+
+    # Compile the model
+    model.compile(optimizer='adam', loss='mean_squared_error')
+
+    # Early stopping to prevent overfitting
+    early_stop = EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True)
+
+    # Train the model
+    history = model.fit(
+        train_ds,
+        epochs=args.epochs,
+        validation_data=val_ds,
+        callbacks=[early_stop]
+    )
+
+    # Save the trained model
+    model.save(args.out)
+
+    if not args.no_plot:
+        # Plot training and validation loss
+        plt.plot(history.history['loss'], label='Train Loss')
+        plt.plot(history.history['val_loss'], label='Val Loss')
+        plt.xlabel("Epoch")
+        plt.ylabel("Loss")
+        plt.title("Training Loss vs Validation Loss")
+        plt.legend()
+        plt.show()
+
+
+if __name__ == "__main__":
+    main()
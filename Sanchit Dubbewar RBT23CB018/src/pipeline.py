@@ -0,0 +1,259 @@
+import pandas as pd
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict, namedtuple
+from datetime import datetime
+from src.fetch_live_data_nasa import fetch_live_data
+from src.predict_live import generate_forecast, DIRECT_MODEL_PATH
+from src.ga_optimization import run_ga_optimization
+from src.fitness_function import fitness_function
+from src.tank_simulation import simulate_tank_levels
+
+PIPELINE_CACHE_DIR = os.getenv("PIPELINE_CACHE_DIR", "data/cache/pipeline")
+MODEL_FILES = ("models/lstm_model.h5", "models/scaler.pkl", DIRECT_MODEL_PATH)
+# Fixed GA seed so a plan recomputed after a cache wipe is the plan that was cached
+GA_SEED = 42
+
+# (stage, progress % when it starts, status message)
+STAGES = [
+    ("fetch", 5, "📡 Fetching live NASA rainfall data (45 days to ensure 30+ valid days)..."),
+    ("forecast", 30, "🔮 Generating LSTM rainfall forecast..."),
+    ("optimize", 55, "⚙️ Running Genetic Algorithm optimization..."),
+    ("simulate", 85, "💧 Simulating tank levels..."),
+]
+
+PipelineResult = namedtuple(
+    "PipelineResult",
+    ["live_df", "forecast_df", "optimized_df", "merged_df", "simulated_df", "ga_score", "keys", "stages"]
+)
+
+
+def frame_digest(df):
+    """Content hash of a DataFrame (column names, dtypes and values; the index is ignored)."""
+    h = hashlib.sha256()
+    h.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def stage_key(stage, *inputs):
+    """Cache key of a stage: hash of its name and everything its output depends on."""
+    payload = json.dumps([stage, inputs], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def file_stamps(paths):
+    """(path, mtime, size) of each file that exists, so retraining a model changes the forecast key."""
+    return [(p, os.path.getmtime(p), os.path.getsize(p)) for p in paths if os.path.exists(p)]
+
+
+class StageCache:
+    """
+    Stage outputs stored under their key: pickled to `cache_dir/<stage>/<key>.pkl`,
+    with the most recent `max_memory_entries` also kept in memory. Thread-safe.
+    """
+
+    def __init__(self, cache_dir=PIPELINE_CACHE_DIR, max_memory_entries=64):
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, stage, key):
+        return os.path.join(self.cache_dir, stage, f"{key}.pkl")
+
+    def _remember(self, stage, key, value):
+        with self._lock:
+            self._memory[(stage, key)] = value
+            self._memory.move_to_end((stage, key))
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, stage, key):
+        """Cached output, or None if this key was never computed."""
+        with self._lock:
+            if (stage, key) in self._memory:
+                self._memory.move_to_end((stage, key))
+                return self._memory[(stage, key)]
+        path = self._path(stage, key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            # Truncated or unreadable entry: treat as a miss and recompute
+            return None
+        self._remember(stage, key, value)
+        return value
+
+    def put(self, stage, key, value):
+        path = self._path(stage, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so readers never see a partial entry
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self._remember(stage, key, value)
+
+    def get_or_compute(self, stage, key, compute):
+        """Returns (value, cached)."""
+        value = self.get(stage, key)
+        if value is not None:
+            return value, True
+        value = compute()
+        self.put(stage, key, value)
+        return value, False
+
+
+class PipelineProgress:
+    """Progress of a pipeline run, written by the worker thread and polled by the UI."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.percent = 0
+        self.message = "⏳ Queued..."
+        self.stages = {name: "pending" for name, _, _ in STAGES}
+
+    def update(self, stage=None, status=None, percent=None, message=None):
+        with self._lock:
+            if stage is not None:
+                self.stages[stage] = status
+            if percent is not None:
+                self.percent = percent
+            if message is not None:
+                self.message = message
+
+    def snapshot(self):
+        """Consistent copy: {'percent', 'message', 'stages'}."""
+        with self._lock:
+            return {"percent": self.percent, "message": self.message, "stages": dict(self.stages)}
+
+
+def run_pipeline(
+    lat,
+    lon,
+    catchment_area_m2,
+    runoff_coefficient,
+    tank_capacity_liters,
+    initial_storage_liters,
+    usage_min,
+    usage_max,
+    days_back=45,
+    days_to_predict=7,
+    seed=GA_SEED,
+    cache=None,
+    progress=None
+):
+    """
+    Fetch -> forecast -> GA -> tank simulation, each stage cached under a key of its inputs.
+
+    The fetch always runs (NASA data is cached and refreshed by fetch_live_data itself);
+    each later stage is keyed by the content of the previous stage's output plus its own
+    parameters. So an unchanged rainfall history skips the LSTM, and changing only the
+    tank parameters re-runs only the GA and the simulation.
+
+    Parameters:
+        lat, lon: location
+        catchment_area_m2, runoff_coefficient, tank_capacity_liters, initial_storage_liters: tank parameters
+        usage_min, usage_max: daily usage constraints in liters
+        seed (int): GA seed (part of the GA key)
+        cache (StageCache): Stage cache to use (default: a new one on PIPELINE_CACHE_DIR)
+        progress (PipelineProgress): Updated as stages start and finish
+
+    Returns:
+        PipelineResult: stage outputs, the GA fitness of the chosen plan, the key of
+            each stage and whether it was 'cached' or 'computed'
+    """
+    cache = cache or StageCache()
+    progress = progress or PipelineProgress()
+    keys, stages = {}, {}
+    steps = {name: (percent, message) for name, percent, message in STAGES}
+
+    def run_stage(stage, key, compute):
+        percent, message = steps[stage]
+        progress.update(stage, "running", percent, message)
+        value, cached = cache.get_or_compute(stage, key, compute)
+        keys[stage] = key
+        stages[stage] = "cached" if cached else "computed"
+        progress.update(stage, stages[stage])
+        return value
+
+    percent, message = steps["fetch"]
+    progress.update("fetch", "running", percent, message)
+    live_df = fetch_live_data(lat=lat, lon=lon, days_back=days_back)
+    keys["fetch"] = frame_digest(live_df)
+    stages["fetch"] = "computed"
+    progress.update("fetch", "computed")
+
+    # Forecast dates start tomorrow, so the same history gives a new forecast each day
+    forecast_df = run_stage(
+        "forecast",
+        stage_key("forecast", keys["fetch"], days_to_predict, file_stamps(MODEL_FILES), datetime.now().date()),
+        lambda: generate_forecast(live_df, days_to_predict=days_to_predict, save=False)
+    )
+
+    tank = (catchment_area_m2, runoff_coefficient, tank_capacity_liters, initial_storage_liters)
+
+    def optimize():
+        optimized_df, merged_df = run_ga_optimization(forecast_df, *tank, usage_min, usage_max, seed=seed, save=False)
+        score = fitness_function(merged_df["optimized_usage_liters"].tolist(), forecast_df, *tank)
+        return optimized_df, merged_df, score
+
+    optimized_df, merged_df, ga_score = run_stage(
+        "optimize",
+        stage_key("optimize", keys["forecast"], tank, usage_min, usage_max, seed),
+        optimize
+    )
+
+    simulated_df = run_stage(
+        "simulate",
+        stage_key("simulate", keys["optimize"], tank),
+        lambda: simulate_tank_levels(merged_df, *tank)
+    )
+
+    progress.update(percent=100, message="✅ Analysis complete!")
+    return PipelineResult(live_df, forecast_df, optimized_df, merged_df, simulated_df, ga_score, keys, stages)
+
+
+def export_outputs(result, out_dir="outputs"):
+    """
+    Writes the forecast, plan and simulation CSVs, skipping any file whose stage key
+    matches the one recorded in `out_dir/pipeline_manifest.json` (already up to date).
+    run_pipeline runs its stages with save=False, so this is the only writer of these
+    files and the manifest always describes what is on disk.
+
+    Returns:
+        list: paths that were (re)written
+    """
+    manifest_path = os.path.join(out_dir, "pipeline_manifest.json")
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+
+    exports = [
+        ("predictions_next_7_days_on_NASA_data.csv", "forecast", result.forecast_df),
+        ("optimized_plan.csv", "optimize", result.optimized_df),
+        ("final_plan.csv", "optimize", result.merged_df),
+        ("tank_simulation_next_7_days.csv", "simulate", result.simulated_df),
+    ]
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    for name, stage, df in exports:
+        path = os.path.join(out_dir, name)
+        if manifest.get(name) == result.keys[stage] and os.path.exists(path):
+            continue
+        df.to_csv(path, index=False)
+        manifest[name] = result.keys[stage]
+        written.append(path)
+
+    if written:
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+    return written
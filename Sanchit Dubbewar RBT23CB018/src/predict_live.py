@@ -1,12 +1,139 @@
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+import tensorflow as tf
 from tensorflow.keras.models import load_model
 import joblib
 import os
+import threading
 from datetime import datetime, timedelta
 
-def generate_forecast(df, model_path="models/lstm_model.h5", scaler_path="models/scaler.pkl", days_to_predict=7):
+WINDOW_SIZE = 30
+# Written by src/lstm_direct_model.py; used instead of the recursive rollout when present
+DIRECT_MODEL_PATH = "models/lstm_direct_model.h5"
+
+
+class RainfallForecaster:
+    """
+    LSTM model and scaler loaded once and kept warm for repeated forecasts.
+
+    The autoregressive rollout runs as one compiled tf.function call (the model is
+    called directly rather than through model.predict, which rebuilds its
+    data pipeline on every call), for any number of windows at once.
+
+    If a direct multi-horizon model is given, horizons up to its output size are
+    predicted in a single forward pass instead.
+    """
+
+    def __init__(self, model_path="models/lstm_model.h5", scaler_path="models/scaler.pkl", direct_model_path=None):
+        # Check if model files exist
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"❌ LSTM model not found at {model_path}")
+        if not os.path.exists(scaler_path):
+            raise FileNotFoundError(f"❌ Scaler not found at {scaler_path}")
+
+        try:
+            # Inference only: no optimizer/loss needed
+            self.model = load_model(model_path, compile=False)
+            self.scaler = joblib.load(scaler_path)
+        except Exception as e:
+            raise Exception(f"❌ Failed to load model/scaler: {e}")
+
+        # The rollout feeds (batch, 30, 1) windows and appends each 1-day prediction
+        if tuple(self.model.input_shape[1:]) != (WINDOW_SIZE, 1):
+            raise ValueError(f"❌ {model_path} expects input {self.model.input_shape[1:]}, not ({WINDOW_SIZE}, 1); "
+                             f"retrain it with src/lstm_model.py --window-size {WINDOW_SIZE} on rainfall only")
+
+        self.model_path = model_path
+        self.scaler_path = scaler_path
+        self._rollouts = {}
+
+        self.direct_model = None
+        self.direct_horizon = 0
+        if direct_model_path and os.path.exists(direct_model_path):
+            direct_model = load_model(direct_model_path, compile=False)
+            if tuple(direct_model.input_shape[1:]) == (WINDOW_SIZE, 1):
+                self.direct_model = direct_model
+                self.direct_horizon = direct_model.output_shape[-1]
+                self._direct = tf.function(
+                    lambda window: direct_model(window, training=False),
+                    input_signature=[tf.TensorSpec([None, WINDOW_SIZE, 1], tf.float32)]
+                )
+            else:
+                print(f"⚠️ Ignoring {direct_model_path}: expects input {direct_model.input_shape[1:]}, not ({WINDOW_SIZE}, 1)")
+
+        # Warm-up: trace the default 7-day forecast so the first real call is fast
+        self.predict_scaled(np.zeros((1, WINDOW_SIZE, 1), dtype=np.float32), 7)
+
+    def _rollout_fn(self, steps):
+        """Compiled rollout for a fixed horizon: (batch, 30, 1) -> (batch, steps)."""
+        if steps not in self._rollouts:
+            model = self.model
+
+            @tf.function(input_signature=[tf.TensorSpec([None, WINDOW_SIZE, 1], tf.float32)])
+            def rollout(window):
+                predictions = []
+                for _ in range(steps):
+                    next_day = model(window, training=False)  # (batch, 1)
+                    predictions.append(next_day[:, 0])
+                    # Shift window: drop the oldest day, append the prediction
+                    window = tf.concat([window[:, 1:, :], next_day[:, None, :]], axis=1)
+                return tf.stack(predictions, axis=1)
+
+            self._rollouts[steps] = rollout
+        return self._rollouts[steps]
+
+    def uses_direct(self, days_to_predict, method="auto"):
+        if method == "recursive":
+            return False
+        if method == "direct" and days_to_predict > self.direct_horizon:
+            raise ValueError(f"❌ No direct model for a {days_to_predict}-day horizon (have {self.direct_horizon})")
+        return days_to_predict <= self.direct_horizon
+
+    def predict_scaled(self, windows, days_to_predict=7, method="auto"):
+        """
+        Scaled forecasts of shape (batch, days_to_predict) for scaled windows of shape (batch, 30, 1).
+
+        method: 'auto' (direct model when it covers the horizon), 'direct' or 'recursive'
+        """
+        windows = tf.convert_to_tensor(np.asarray(windows, dtype=np.float32))
+        if self.uses_direct(days_to_predict, method):
+            return self._direct(windows).numpy()[:, :days_to_predict]
+        return self._rollout_fn(days_to_predict)(windows).numpy()
+
+    def predict_mm(self, rainfall_windows, days_to_predict=7, method="auto"):
+        """Forecasts in mm/day for raw rainfall windows of shape (batch, 30)."""
+        rainfall_windows = np.asarray(rainfall_windows, dtype=float)
+        batch = rainfall_windows.shape[0]
+        # The scaler was fitted on a 'rainfall_mm' column
+        column = pd.DataFrame({"rainfall_mm": rainfall_windows.reshape(-1)})
+        scaled = self.scaler.transform(column).reshape(batch, WINDOW_SIZE, 1)
+        predictions_scaled = self.predict_scaled(scaled, days_to_predict, method)
+        predictions_scaled = np.clip(predictions_scaled, 0, 1)  # Ensure non-negative
+        return self.scaler.inverse_transform(predictions_scaled.reshape(-1, 1)).reshape(batch, days_to_predict)
+
+
+_forecasters = {}  # file paths -> (their mtimes, RainfallForecaster)
+_forecasters_lock = threading.Lock()
+
+
+def get_forecaster(model_path="models/lstm_model.h5", scaler_path="models/scaler.pkl",
+                   direct_model_path=DIRECT_MODEL_PATH):
+    """
+    Process-wide RainfallForecaster for these files, created on first use.
+    Reloaded automatically if any of the files changes on disk (or appears); the
+    superseded forecaster is dropped, so retraining doesn't pile up loaded models.
+    """
+    paths = tuple(os.path.abspath(p) for p in (model_path, scaler_path, direct_model_path) if p)
+    stamps = tuple(os.path.getmtime(p) if os.path.exists(p) else None for p in paths)
+    with _forecasters_lock:
+        entry = _forecasters.get(paths)
+        if entry is None or entry[0] != stamps:
+            _forecasters[paths] = entry = (stamps, RainfallForecaster(model_path, scaler_path, direct_model_path))
+        return entry[1]
+
+
+def generate_forecast(df, model_path="models/lstm_model.h5", scaler_path="models/scaler.pkl", days_to_predict=7,
+                      save_plot=False, direct_model_path=DIRECT_MODEL_PATH, save=True):
     """
     Generate a rainfall forecast for the next `days_to_predict` days using a pre-trained LSTM model.
     The forecast starts from tomorrow (today + 1 day) to provide future predictions.
@@ -16,6 +143,9 @@ def generate_forecast(df, model_path="models/lstm_model.h5", scaler_path="models
         model_path (str): Path to saved LSTM model
         scaler_path (str): Path to saved scaler
         days_to_predict (int): Number of days to forecast
+        save_plot (bool): Also render the PNG plot (see save_forecast_plot)
+        direct_model_path (str): Direct multi-horizon model, used when it exists and covers the horizon
+        save (bool): Write outputs/predictions_next_7_days_on_NASA_data.csv
 
     Returns:
         pd.DataFrame: Forecast DataFrame with columns ['date', 'predicted_rainfall_mm']
@@ -31,50 +161,21 @@ def generate_forecast(df, model_path="models/lstm_model.h5", scaler_path="models
     if len(df) < 30:
         raise ValueError(f"❌ Need at least 30 days of data, got {len(df)}")
 
-    # Ensure output folders exist
-    os.makedirs("outputs/plots", exist_ok=True)
-    os.makedirs("outputs", exist_ok=True)
-
-    # Check if model files exist
-    if not os.path.exists(model_path):
-        raise FileNotFoundError(f"❌ LSTM model not found at {model_path}")
-    if not os.path.exists(scaler_path):
-        raise FileNotFoundError(f"❌ Scaler not found at {scaler_path}")
-
-    try:
-        # Load model and scaler
-        model = load_model(model_path)
-        scaler = joblib.load(scaler_path)
-    except Exception as e:
-        raise Exception(f"❌ Failed to load model/scaler: {e}")
+    # Loaded once per process, then reused
+    forecaster = get_forecaster(model_path, scaler_path, direct_model_path)
 
-    # Sort and scale rainfall data
+    # Sort rainfall data
     df = df.sort_values("date").reset_index(drop=True)
     
     # Use last 30 days for prediction (LSTM input requirement)
-    last_30_days = df.tail(30)
-    scaled = scaler.transform(last_30_days[["rainfall_mm"]])
-    
-    # Reshape for LSTM: (samples, timesteps, features)
-    last_30 = scaled[-30:].reshape(1, 30, 1)
+    last_30_days = df.tail(WINDOW_SIZE)["rainfall_mm"].to_numpy()
 
-    print(f"🔮 Generating {days_to_predict} day forecast using last 30 days of data...")
+    method = "direct" if forecaster.uses_direct(days_to_predict) else "recursive"
+    print(f"🔮 Generating {days_to_predict} day forecast ({method}) using last 30 days of data...")
     print(f"📅 Last data date: {df['date'].iloc[-1].strftime('%Y-%m-%d')}")
 
-    # Generate predictions
-    predictions_scaled = []
-    current_input = last_30.copy()
-    
-    for day in range(days_to_predict):
-        next_day = model.predict(current_input, verbose=0)[0][0]
-        predictions_scaled.append(next_day)
-        # Update input for next prediction (shift window)
-        current_input = np.append(current_input[:, 1:, :], [[[next_day]]], axis=1)
-
-    # Inverse transform to mm
-    predictions_scaled = np.array(predictions_scaled).reshape(-1, 1)
-    predictions_scaled = np.clip(predictions_scaled, 0, 1)  # Ensure non-negative
-    predictions_mm = scaler.inverse_transform(predictions_scaled).flatten()
+    # Generate predictions (mm)
+    predictions_mm = forecaster.predict_mm(last_30_days[None, :], days_to_predict)[0]
 
     # Create forecast DataFrame starting from tomorrow
     today = datetime.now().date()
@@ -87,7 +188,27 @@ def generate_forecast(df, model_path="models/lstm_model.h5", scaler_path="models
     })
 
     # Save to CSV
-    forecast_df.to_csv("outputs/predictions_next_7_days_on_NASA_data.csv", index=False)
+    if save:
+        os.makedirs("outputs", exist_ok=True)
+        forecast_df.to_csv("outputs/predictions_next_7_days_on_NASA_data.csv", index=False)
+
+    if save_plot:
+        save_forecast_plot(df, forecast_df)
+
+    print(f"✅ Forecast generated for {days_to_predict} days starting from {start_date.strftime('%Y-%m-%d')}")
+    print(f"📊 Forecast range: {forecast_df['date'].min().strftime('%Y-%m-%d')} to {forecast_df['date'].max().strftime('%Y-%m-%d')}")
+    print(f"🌧️ Average predicted rainfall: {np.mean(predictions_mm):.2f} mm/day")
+    
+    return forecast_df
+
+
+def save_forecast_plot(df, forecast_df, path="outputs/plots/rainfall_forecast_next_7_days_on_NASA_data.png", dpi=300):
+    """Renders the historical-vs-forecast PNG. Kept out of generate_forecast's default path (slow at 300 dpi)."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
 
     # Create enhanced plot
     plt.figure(figsize=(12, 6))
@@ -109,20 +230,14 @@ def generate_forecast(df, model_path="models/lstm_model.h5", scaler_path="models
     plt.tight_layout()
     
     # Save plot
-    plt.savefig("outputs/plots/rainfall_forecast_next_7_days_on_NASA_data.png", dpi=300, bbox_inches='tight')
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
     plt.close()
 
-    print(f"✅ Forecast generated for {days_to_predict} days starting from {start_date.strftime('%Y-%m-%d')}")
-    print(f"📊 Forecast range: {forecast_df['date'].min().strftime('%Y-%m-%d')} to {forecast_df['date'].max().strftime('%Y-%m-%d')}")
-    print(f"🌧️ Average predicted rainfall: {np.mean(predictions_mm):.2f} mm/day")
-    
-    return forecast_df
-
 
 if __name__ == "__main__":
     # Standalone test: read from CSV
     try:
         df = pd.read_csv("data/processed/live_input.csv", parse_dates=["date"])
-        generate_forecast(df)
+        generate_forecast(df, save_plot=True)
     except Exception as e:
         print(f"❌ Error: {e}")
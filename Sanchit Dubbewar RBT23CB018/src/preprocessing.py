@@ -1,56 +1,117 @@
+import argparse
+import glob
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import MinMaxScaler
-import matplotlib.pyplot as plt
-
-# Step 1: Load raw data (skip metadata header)
-df = pd.read_csv("data/raw/POWER_Point_Daily_19850101_20250101_018d53N_073d85E_LST.csv", skiprows=9)
-
-# Step 2: Rename for clarity
-df.columns = ["YEAR", "DOY", "rainfall_mm"]
-
-# Step 3: Convert YEAR + DOY → full date
-df["date"] = pd.to_datetime(df["YEAR"] * 1000 + df["DOY"], format="%Y%j")
-
-# Step 4: Keep only the needed columns
-df = df[["date", "rainfall_mm"]]
-df = df.sort_values("date")
-
-# Step 5: Normalize rainfall
-scaler = MinMaxScaler()
-scaled_rain = scaler.fit_transform(df[["rainfall_mm"]])
-df["scaled_rain"] = scaled_rain
-
-# Step 6: Create sequences
-def create_sequences(data, window_size):
-    X, y = [], []
-    for i in range(window_size, len(data)):
-        X.append(data[i - window_size:i, 0])
-        y.append(data[i, 0])
-    return np.array(X), np.array(y)
-
-window_size = 30
-X, y = create_sequences(scaled_rain, window_size)
-X = X.reshape((X.shape[0], X.shape[1], 1))
-
-# Step 7: Split into training and test sets (80/20)
-split = int(0.8 * len(X))
-X_train, X_test = X[:split], X[split:]
-y_train, y_test = y[:split], y[split:]
-
-# Step 8: Confirm
-print("X_train shape:", X_train.shape)
-print("y_train shape:", y_train.shape)
-print("X_test shape:", X_test.shape)
-print("y_test shape:", y_test.shape)
-
-# Save sequences for model script
-np.save("data/processed/X_train.npy", X_train)
-np.save("data/processed/y_train.npy", y_train)
-np.save("data/processed/X_test.npy", X_test)
-np.save("data/processed/y_test.npy", y_test)
-
-# Save the scaler for later use
 import joblib
-joblib.dump(scaler, "models/scaler.pkl")
-print("✅ Scaler saved to models/scaler.pkl")
+import os
+from src.windowing import save_series, train_test_starts, gather_windows
+
+RAW_FILES = "data/raw/POWER_Point_Daily_*.csv"
+
+# NASA POWER parameter -> column name used in this project
+POWER_COLUMNS = {
+    "PRECTOTCORR": "rainfall_mm",
+    "T2M": "temperature_c",
+    "RH2M": "humidity_pct",
+}
+
+
+def load_power_csv(path):
+    """Reads a NASA POWER daily point CSV (any number of parameters) into ['date', <features>]."""
+    # Skip the metadata header
+    with open(path) as f:
+        header_lines = 0
+        for line in f:
+            header_lines += 1
+            if line.startswith("-END HEADER-"):
+                break
+        else:
+            header_lines = 0
+    df = pd.read_csv(path, skiprows=header_lines)
+
+    # Convert YEAR + DOY → full date
+    df["date"] = pd.to_datetime(df["YEAR"] * 1000 + df["DOY"], format="%Y%j")
+    df = df.rename(columns=POWER_COLUMNS)
+    features = [c for c in POWER_COLUMNS.values() if c in df.columns]
+    df = df[["date"] + features].sort_values("date").reset_index(drop=True)
+
+    # -999 marks missing source data: carry the previous valid value forward
+    df[features] = df[features].replace(-999.0, np.nan).ffill().fillna(0.0)
+    return df
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Scale NASA POWER daily data into a single training series")
+    ap.add_argument("raw", nargs="*", help=f"NASA POWER CSVs, one per location (default: {RAW_FILES})")
+    ap.add_argument("--features", nargs="+", default=["rainfall_mm"],
+                    help="Input features; rainfall_mm (the target) must come first")
+    ap.add_argument("--window-size", type=int, default=30, help="Window size reported in the shape summary")
+    ap.add_argument("--train-fraction", type=float, default=0.8)
+    ap.add_argument("--export-npy", action="store_true",
+                    help="Also write the legacy X_train/X_test/y_train/y_test.npy window arrays")
+    args = ap.parse_args()
+
+    if args.features[0] != "rainfall_mm":
+        ap.error("the first feature must be rainfall_mm")
+
+    # Step 1: Load raw data, one file per location
+    paths = args.raw or sorted(glob.glob(RAW_FILES))
+    frames = [load_power_csv(p) for p in paths]
+    for path, df in zip(paths, frames):
+        missing = set(args.features) - set(df.columns)
+        if missing:
+            raise ValueError(f"❌ {path} has no {sorted(missing)} column(s)")
+
+    # Step 2: Normalize. Rainfall keeps its own scaler (models/scaler.pkl, used for forecasting);
+    # any extra features share a second one
+    all_rows = pd.concat(frames, ignore_index=True)
+    scaler = MinMaxScaler()
+    scaler.fit(all_rows[["rainfall_mm"]])
+    extra = args.features[1:]
+    feature_scaler = MinMaxScaler().fit(all_rows[extra]) if extra else None
+
+    def scale(df):
+        parts = [scaler.transform(df[["rainfall_mm"]])]
+        if feature_scaler is not None:
+            parts.append(feature_scaler.transform(df[extra]))
+        return np.hstack(parts)
+
+    # Step 3: Store the scaled series once; windows are views into it (see src/windowing.py)
+    series = np.vstack([scale(df) for df in frames]).astype(np.float32)
+    segment_lengths = [len(df) for df in frames]
+    meta = {
+        "features": args.features,
+        "segment_lengths": segment_lengths,
+        "sources": paths,
+        "start_dates": [df["date"].iloc[0].strftime("%Y-%m-%d") for df in frames],
+        "train_fraction": args.train_fraction,
+    }
+    save_series(series, meta)
+
+    # Step 4: Confirm
+    train_starts, test_starts = train_test_starts(segment_lengths, args.window_size, args.train_fraction)
+    print("Series shape:", series.shape, f"({len(frames)} location(s), features: {', '.join(args.features)})")
+    print(f"Windows of {args.window_size} days: {len(train_starts)} train, {len(test_starts)} test")
+    print("✅ Scaled series saved to data/processed/series.npy")
+
+    if args.export_npy:
+        X_train, y_train = gather_windows(series, train_starts, args.window_size)
+        X_test, y_test = gather_windows(series, test_starts, args.window_size)
+        np.save("data/processed/X_train.npy", X_train)
+        np.save("data/processed/y_train.npy", y_train)
+        np.save("data/processed/X_test.npy", X_test)
+        np.save("data/processed/y_test.npy", y_test)
+        print("✅ Window arrays saved to data/processed/X_*.npy, y_*.npy")
+
+    # Save the scaler for later use
+    os.makedirs("models", exist_ok=True)
+    joblib.dump(scaler, "models/scaler.pkl")
+    print("✅ Scaler saved to models/scaler.pkl")
+    if feature_scaler is not None:
+        joblib.dump(feature_scaler, "models/feature_scaler.pkl")
+        print("✅ Feature scaler saved to models/feature_scaler.pkl")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,80 @@
 import pandas as pd
+import numpy as np
+from collections import namedtuple
+
+# Arrays of shape (..., days) returned by simulate_tank_batch
+TankSimulation = namedtuple("TankSimulation", ["inflow", "storage", "overflow", "shortage"])
+
+
+def simulate_tank_batch(
+    rainfall_mm,
+    usage_liters,
+    catchment_area_m2,
+    runoff_coefficient,
+    tank_capacity_liters,
+    initial_storage_liters=0,
+    net_daily_balance=False
+):
+    """
+    Vectorized tank water balance for many scenarios at once.
+
+    Every argument is broadcast against the others, so one call can evaluate
+    usage plans x rainfall scenarios x tank configurations. The last axis of
+    `rainfall_mm` and `usage_liters` is the day; the tank parameters apply to the
+    leading axes. Example: plans (P, 1, 1, D), forecasts (1, S, 1, D) and
+    capacities (1, 1, C) give arrays of shape (P, S, C, D).
+
+    Only the day axis is looped over; each step updates all scenarios together.
+
+    Parameters:
+        rainfall_mm (array-like): Daily rainfall, shape (..., days)
+        usage_liters (array-like): Daily usage, shape (..., days)
+        catchment_area_m2, runoff_coefficient, tank_capacity_liters,
+        initial_storage_liters (float or array-like): Tank parameters, shape (...)
+        net_daily_balance (bool): If False (as in simulate_tank_levels), inflow is
+            stored, anything above capacity overflows, then the day's usage is drawn.
+            If True (as in the GA fitness function), inflow and usage are netted
+            first and only the day's net surplus can overflow.
+
+    Returns:
+        TankSimulation: inflow, storage (end of day), overflow and shortage arrays in liters
+    """
+    rainfall_mm = np.asarray(rainfall_mm, dtype=float)
+    usage_liters = np.asarray(usage_liters, dtype=float)
+    # Tank parameters get a trailing axis so they broadcast against the day axis
+    area = np.asarray(catchment_area_m2, dtype=float)[..., None]
+    runoff = np.asarray(runoff_coefficient, dtype=float)[..., None]
+    capacity = np.asarray(tank_capacity_liters, dtype=float)[..., None]
+    initial = np.asarray(initial_storage_liters, dtype=float)[..., None]
+
+    inflow = rainfall_mm * area * runoff
+    shape = np.broadcast_shapes(inflow.shape, usage_liters.shape, capacity.shape, initial.shape)
+    inflow = np.broadcast_to(inflow, shape)
+    usage = np.broadcast_to(usage_liters, shape)
+    capacity = np.broadcast_to(capacity, shape[:-1] + (1,))[..., 0]
+
+    storage = np.empty(shape)
+    overflow = np.empty(shape)
+    shortage = np.empty(shape)
+    current = np.broadcast_to(initial, shape[:-1] + (1,))[..., 0].copy()
+
+    for day in range(shape[-1]):
+        if net_daily_balance:
+            current += inflow[..., day] - usage[..., day]
+            np.maximum(current - capacity, 0, out=overflow[..., day])
+            np.minimum(current, capacity, out=current)
+            np.maximum(-current, 0, out=shortage[..., day])
+        else:
+            current += inflow[..., day]
+            np.maximum(current - capacity, 0, out=overflow[..., day])
+            np.minimum(current, capacity, out=current)
+            current -= usage[..., day]
+            np.maximum(-current, 0, out=shortage[..., day])
+        np.maximum(current, 0, out=current)
+        storage[..., day] = current
+
+    return TankSimulation(inflow, storage, overflow, shortage)
+
 
 def simulate_tank_levels(
     merged_df,
@@ -9,53 +85,79 @@ def simulate_tank_levels(
 ):
     """
     Simulate tank levels based on forecasted rainfall and optimized usage.
-    
+
     Parameters:
         merged_df (pd.DataFrame): Must have columns ['date', 'predicted_rainfall_mm', 'optimized_usage_liters']
         catchment_area_m2 (float): Catchment area in square meters
         runoff_coefficient (float): Runoff coefficient (0.0 to 1.0)
         tank_capacity_liters (float): Tank capacity in liters
         initial_storage_liters (float): Initial storage level in liters
-        
+
     Returns:
         pd.DataFrame: Simulation results with columns:
-            ['date', 'rainfall_mm', 'inflow_liters', 'usage_liters', 
+            ['date', 'rainfall_mm', 'inflow_liters', 'usage_liters',
              'storage_liters', 'overflow_liters', 'shortage_liters']
     """
-    results = []
-    current_storage = initial_storage_liters
+    rainfall_mm = merged_df['predicted_rainfall_mm'].to_numpy(dtype=float)
+    usage_liters = merged_df['optimized_usage_liters'].to_numpy(dtype=float)
 
-    for _, row in merged_df.iterrows():
-        date = row['date']
-        rainfall_mm = row['predicted_rainfall_mm']
-        daily_usage_liters = row['optimized_usage_liters']
+    sim = simulate_tank_batch(
+        rainfall_mm, usage_liters,
+        catchment_area_m2, runoff_coefficient,
+        tank_capacity_liters, initial_storage_liters
+    )
 
-        inflow_liters = rainfall_mm * catchment_area_m2 * runoff_coefficient
-        current_storage += inflow_liters
+    return pd.DataFrame({
+        "date": merged_df['date'].to_numpy(),
+        "rainfall_mm": rainfall_mm,
+        "inflow_liters": np.round(sim.inflow, 2),
+        "usage_liters": np.round(usage_liters, 2),
+        "storage_liters": np.round(sim.storage, 2),
+        "overflow_liters": np.round(sim.overflow, 2),
+        "shortage_liters": np.round(sim.shortage, 2)
+    })
 
-        overflow = 0
-        if current_storage > tank_capacity_liters:
-            overflow = current_storage - tank_capacity_liters
-            current_storage = tank_capacity_liters
 
-        shortage = 0
-        if current_storage >= daily_usage_liters:
-            current_storage -= daily_usage_liters
-        else:
-            shortage = daily_usage_liters - current_storage
-            current_storage = 0
-
-        results.append({
-            "date": date,
-            "rainfall_mm": rainfall_mm,
-            "inflow_liters": round(inflow_liters, 2),
-            "usage_liters": round(daily_usage_liters, 2),
-            "storage_liters": round(current_storage, 2),
-            "overflow_liters": round(overflow, 2),
-            "shortage_liters": round(shortage, 2)
-        })
-
-    return pd.DataFrame(results)
+def sweep_tank_configurations(
+    merged_df,
+    catchment_areas_m2,
+    tank_capacities_liters,
+    runoff_coefficient=0.85,
+    initial_storage_liters=0
+):
+    """
+    What-if sweep: simulate the plan in `merged_df` for every combination of
+    catchment area and tank capacity in a single vectorized pass.
+
+    Returns:
+        pd.DataFrame: One row per (catchment_area_m2, tank_capacity_liters) with
+            total inflow, overflow and shortage, the minimum and final storage,
+            and the number of shortage days
+    """
+    areas, capacities = np.meshgrid(
+        np.asarray(catchment_areas_m2, dtype=float),
+        np.asarray(tank_capacities_liters, dtype=float),
+        indexing="ij"
+    )
+    # Starting level can't exceed the tank it is poured into
+    initial = np.minimum(initial_storage_liters, capacities)
+
+    sim = simulate_tank_batch(
+        merged_df['predicted_rainfall_mm'].to_numpy(dtype=float),
+        merged_df['optimized_usage_liters'].to_numpy(dtype=float),
+        areas, runoff_coefficient, capacities, initial
+    )
+
+    return pd.DataFrame({
+        "catchment_area_m2": areas.ravel(),
+        "tank_capacity_liters": capacities.ravel(),
+        "total_inflow_liters": sim.inflow.sum(axis=-1).ravel().round(2),
+        "total_overflow_liters": sim.overflow.sum(axis=-1).ravel().round(2),
+        "total_shortage_liters": sim.shortage.sum(axis=-1).ravel().round(2),
+        "min_storage_liters": sim.storage.min(axis=-1).ravel().round(2),
+        "final_storage_liters": sim.storage[..., -1].ravel().round(2),
+        "shortage_days": (sim.shortage > 0).sum(axis=-1).ravel()
+    })
 
 
 if __name__ == "__main__":
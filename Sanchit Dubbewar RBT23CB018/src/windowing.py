@@ -0,0 +1,111 @@
+import json
+import os
+import numpy as np
+
+SERIES_PATH = "data/processed/series.npy"
+SERIES_META_PATH = "data/processed/series_meta.json"
+
+
+def sliding_windows(series, window_size):
+    """
+    All overlapping windows of a (T, F) series as a read-only (T - window_size + 1, window_size, F)
+    view. Nothing is copied; indexing the view with a batch of starts copies just that batch.
+    """
+    series = np.asarray(series) if not isinstance(series, np.memmap) else series
+    if series.ndim == 1:
+        series = series[:, None]
+    # sliding_window_view puts the window axis last: (N, F, window) -> (N, window, F)
+    return np.lib.stride_tricks.sliding_window_view(series, window_size, axis=0).transpose(0, 2, 1)
+
+
+def window_starts(segment_lengths, window_size, horizon=1):
+    """
+    Start index of every (window, next `horizon` days target) sample in a concatenation
+    of segments (e.g. one segment per location). Windows and targets never cross a
+    segment boundary.
+
+    Returns one array of starts per segment, in time order.
+    """
+    starts = []
+    offset = 0
+    for length in segment_lengths:
+        starts.append(np.arange(offset, offset + max(0, length - window_size - horizon + 1)))
+        offset += length
+    return starts
+
+
+def train_test_starts(segment_lengths, window_size, train_fraction=0.8, horizon=1):
+    """Chronological split of each segment's windows: first `train_fraction` train, rest test."""
+    train, test = [], []
+    for starts in window_starts(segment_lengths, window_size, horizon):
+        split = int(train_fraction * len(starts))
+        train.append(starts[:split])
+        test.append(starts[split:])
+    return np.concatenate(train), np.concatenate(test)
+
+
+def gather_windows(series, starts, window_size, target_column=0, horizon=1):
+    """
+    (X, y) for the given window starts: X (n, window_size, F) and y the target column on the
+    day after each window, shape (n,), or on the next `horizon` days, shape (n, horizon).
+    """
+    windows = sliding_windows(series, window_size)
+    target = series[:, target_column] if np.ndim(series) == 2 else series
+    x = np.ascontiguousarray(windows[starts], dtype=np.float32)
+    if horizon == 1:
+        y = np.asarray(target[starts + window_size], dtype=np.float32)
+    else:
+        y = np.asarray(target[(starts + window_size)[:, None] + np.arange(horizon)], dtype=np.float32)
+    return x, y
+
+
+def window_batches(series, starts, window_size, batch_size=64, target_column=0, shuffle=False, seed=None,
+                   horizon=1):
+    """Yields (X, y) batches read on the fly from the series (e.g. an np.load(..., mmap_mode='r') array)."""
+    order = np.array(starts)
+    if shuffle:
+        np.random.default_rng(seed).shuffle(order)
+    for i in range(0, len(order), batch_size):
+        yield gather_windows(series, order[i:i + batch_size], window_size, target_column, horizon)
+
+
+def window_dataset(series, starts, window_size, batch_size=64, target_column=0, shuffle=False, seed=None,
+                   horizon=1):
+    """
+    tf.data.Dataset of (X, y) batches built from the series on the fly, so no window
+    array is ever materialized. Reshuffled every epoch when shuffle=True.
+    """
+    import tensorflow as tf
+
+    n_features = 1 if np.ndim(series) == 1 else series.shape[1]
+    epoch = [0]
+
+    def generator():
+        epoch_seed = None if seed is None else seed + epoch[0]
+        epoch[0] += 1
+        yield from window_batches(series, starts, window_size, batch_size, target_column, shuffle, epoch_seed,
+                                  horizon)
+
+    dataset = tf.data.Dataset.from_generator(
+        generator,
+        output_signature=(
+            tf.TensorSpec(shape=(None, window_size, n_features), dtype=tf.float32),
+            tf.TensorSpec(shape=(None,) if horizon == 1 else (None, horizon), dtype=tf.float32),
+        )
+    )
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+def save_series(series, meta, series_path=SERIES_PATH, meta_path=SERIES_META_PATH):
+    """Stores the scaled (T, F) series once, plus its metadata (features, segment lengths, ...)."""
+    os.makedirs(os.path.dirname(series_path) or ".", exist_ok=True)
+    np.save(series_path, np.asarray(series, dtype=np.float32))
+    with open(meta_path, "w") as f:
+        json.dump(meta, f, indent=2)
+
+
+def load_series(series_path=SERIES_PATH, meta_path=SERIES_META_PATH):
+    """Memory-mapped series and its metadata; windows are read from disk as they are used."""
+    with open(meta_path) as f:
+        meta = json.load(f)
+    return np.load(series_path, mmap_mode="r"), meta
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules are imported as `src.<name>`, relative to the project root one directory up
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
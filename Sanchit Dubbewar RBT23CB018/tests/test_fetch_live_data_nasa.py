@@ -0,0 +1,102 @@
+"""
+NASA POWER cache tests, against the local stand-in API server (no network needed).
+
+Run from the project root with: python -m pytest tests
+"""
+
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from src.benchmark_pipeline import StandInPowerServer
+from src.fetch_live_data_nasa import (
+    fetch_rainfall_history, is_fresh, location_key, missing_spans, open_cache, update_cache,
+)
+
+LAT, LON = 18.54, 73.85
+START = date(2025, 6, 1)
+END = START + timedelta(days=29)
+
+
+def days(first, n):
+    return [first + timedelta(days=i) for i in range(n)]
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "nasa_power.sqlite")
+
+
+@pytest.fixture
+def server():
+    with StandInPowerServer() as server:
+        yield server
+
+
+def test_missing_spans_groups_contiguous_runs():
+    assert missing_spans([]) == []
+    assert missing_spans([START]) == [(START, START)]
+    dates = days(START, 3) + days(START + timedelta(days=5), 2) + [START + timedelta(days=9)]
+    assert missing_spans(dates) == [
+        (START, START + timedelta(days=2)),
+        (START + timedelta(days=5), START + timedelta(days=6)),
+        (START + timedelta(days=9), START + timedelta(days=9)),
+    ]
+
+
+def test_is_fresh_covers_window_and_expires(cache_path):
+    conn = open_cache(cache_path)
+    try:
+        assert not is_fresh(conn, LAT, LON, START, END)
+        update_cache(conn, LAT, LON, {d.strftime("%Y%m%d"): 1.0 for d in days(START, 30)}, START, END)
+
+        assert is_fresh(conn, LAT, LON, START, END, max_age_hours=6)
+        assert is_fresh(conn, LAT, LON, START + timedelta(days=5), END, max_age_hours=6)
+        # A wider window than was fetched, or another location, is not covered
+        assert not is_fresh(conn, LAT, LON, START, END + timedelta(days=1), max_age_hours=6)
+        assert not is_fresh(conn, LAT + 1, LON, START, END, max_age_hours=6)
+
+        # Backdate the fetch past max_age_hours
+        fetched_at = (datetime.now(timezone.utc) - timedelta(hours=7)).isoformat()
+        with conn:
+            conn.execute("UPDATE fetch_log SET fetched_at = ? WHERE lat = ? AND lon = ?",
+                         (fetched_at, *location_key(LAT, LON)))
+        assert not is_fresh(conn, LAT, LON, START, END, max_age_hours=6)
+        assert is_fresh(conn, LAT, LON, START, END, max_age_hours=8)
+    finally:
+        conn.close()
+
+
+def test_fresh_location_is_served_from_cache(cache_path, server):
+    df, made = fetch_rainfall_history(LAT, LON, START, END, cache_path, server.url)
+    assert made == 1 and server.spans == [(START, END)]
+    assert len(df) == 30
+
+    again, made = fetch_rainfall_history(LAT, LON, START, END, cache_path, server.url)
+    assert made == 0 and server.requests == 1
+    assert again.equals(df)
+
+
+def test_only_missing_runs_are_requested(cache_path, server):
+    fetch_rainfall_history(LAT, LON, START, END, cache_path, server.url)
+
+    # Punch two holes into the cached days
+    holes = days(START + timedelta(days=3), 2) + days(START + timedelta(days=20), 4)
+    conn = open_cache(cache_path)
+    with conn:
+        conn.executemany("DELETE FROM rainfall WHERE lat = ? AND lon = ? AND date = ?",
+                         [(*location_key(LAT, LON), d.isoformat()) for d in holes])
+    conn.close()
+
+    server.spans.clear()
+    df, made = fetch_rainfall_history(LAT, LON, START, END, cache_path, server.url, max_age_hours=0)
+    assert made == 2
+    assert server.spans == missing_spans(holes)
+    assert len(df) == 30
+
+    # Extending the window fetches just the new days
+    server.spans.clear()
+    later = END + timedelta(days=5)
+    df, made = fetch_rainfall_history(LAT, LON, START, later, cache_path, server.url)
+    assert made == 1 and server.spans == [(END + timedelta(days=1), later)]
+    assert len(df) == 35
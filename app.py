@@ -1,5 +1,9 @@
 import os
 import json
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
 from flask import Flask, render_template, request, jsonify
 from dotenv import load_dotenv
 from google import genai
@@ -27,48 +31,172 @@ except Exception as e:
     MODEL_NAME = None
 
 
+SYSTEM_PROMPT = (
+    "You are a friendly and intelligent assistant. "
+    "Analyze the user's message sentiment (Positive, Negative, Neutral, or Mixed) "
+    "and then provide a helpful response. "
+    "Respond strictly in JSON format with two keys: 'sentiment' and 'response'. "
+    "Example: {'sentiment': 'Positive', 'response': 'That sounds wonderful!'}"
+)
+
+
+# --- Response Cache ---
+CACHE_MAX_ENTRIES = int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "1024"))
+CACHE_TTL_SECONDS = float(os.getenv("CHAT_CACHE_TTL_SECONDS", "3600"))
+
+
+def normalize_message(message):
+    """Case- and whitespace-insensitive cache key text."""
+    return " ".join(message.lower().split())
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU + TTL cache that also coalesces concurrent identical requests:
+    while one thread calls the model for a key, others with the same key wait
+    for its result instead of making their own upstream call.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()   # key -> (expires_at, value)
+        self._inflight = {}             # key -> Future
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "expired": 0}
+
+    def _store(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def get_or_compute(self, key, compute):
+        """
+        Returns the cached value for key, or computes it with compute() -> (value, cacheable).
+        Only cacheable results are stored.
+        """
+        value, future, owner = self.begin(key)
+        if future is None:
+            return value
+        if not owner:
+            return future.result()
+
+        try:
+            value, cacheable = compute()
+        except BaseException as e:
+            self.fail(key, e)
+            raise
+        self.finish(key, value, cacheable)
+        return value
+
+    def begin(self, key):
+        """
+        Lookup step of get_or_compute, for callers that can't pass a plain compute()
+        (e.g. coroutines or streams). Returns (value, None, False) on a hit, otherwise
+        (None, future, owner): the owner must call finish() or fail() for key, and
+        everyone else waits on the future.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return entry[1], None, False
+                del self._entries[key]
+                self.stats["expired"] += 1
+
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                return None, future, False
+            future = self._inflight[key] = Future()
+            self.stats["misses"] += 1
+            return None, future, True
+
+    def finish(self, key, value, cacheable):
+        """Publishes the owner's result to waiters; stores it if cacheable."""
+        with self._lock:
+            future = self._inflight.pop(key)
+            if cacheable:
+                self._store(key, value)
+        future.set_result(value)
+
+    def fail(self, key, error):
+        """Releases key after the owner failed; waiters get `error` raised."""
+        with self._lock:
+            future = self._inflight.pop(key)
+        future.set_exception(error)
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"] + self.stats["coalesced"]
+            return {
+                **self.stats,
+                "size": len(self._entries),
+                "inflight": len(self._inflight),
+                "hit_rate": round((self.stats["hits"] + self.stats["coalesced"]) / lookups, 4) if lookups else 0.0,
+            }
+
+
+response_cache = ResponseCache()
+
+
 # --- Chatbot Core Function ---
 def get_chatbot_response(user_message):
     """
     Generates a response using Gemini with built-in sentiment analysis.
+    Identical messages (after normalization) are served from the response cache.
     """
 
     if not client:
         return "⚠️ Gemini client not initialized properly."
 
-    system_prompt = (
-        "You are a friendly and intelligent assistant. "
-        "Analyze the user's message sentiment (Positive, Negative, Neutral, or Mixed) "
-        "and then provide a helpful response. "
-        "Respond strictly in JSON format with two keys: 'sentiment' and 'response'. "
-        "Example: {'sentiment': 'Positive', 'response': 'That sounds wonderful!'}"
-    )
+    key = (MODEL_NAME, normalize_message(user_message))
+    return response_cache.get_or_compute(key, lambda: _generate_response(user_message))
+
 
-    # Combine system prompt and user input
-    final_prompt = f"{system_prompt}\n\nUser message: {user_message}"
+def _generate_response(user_message):
+    """
+    Calls Gemini once. Returns (text, cacheable); errors and non-JSON replies are not cached.
+    """
 
     try:
         # Generate structured response
         response = client.models.generate_content(
             model=MODEL_NAME,
-            contents=final_prompt
+            contents=build_prompt(user_message)
         )
+        return parse_model_output(response.text.strip())
 
-        raw_text = response.text.strip()
+    except Exception as e:
+        return f"❌ Error during API call: {str(e)}", False
 
-        # Parse model JSON output
-        try:
-            data = json.loads(raw_text)
-            sentiment = data.get("sentiment", "Unknown")
-            answer = data.get("response", "Sorry, I couldn’t process that.")
-            return f"🧭 **Sentiment:** {sentiment}\n\n💬 **Chatbot:** {answer}"
 
-        except json.JSONDecodeError:
-            # Handle plain-text fallback
-            return f"⚠️ Model returned non-JSON response:\n{raw_text}"
+def build_prompt(user_message):
+    """Combines the system prompt and user input."""
+    return f"{SYSTEM_PROMPT}\n\nUser message: {user_message}"
+
+
+def format_response(sentiment, answer):
+    return f"🧭 **Sentiment:** {sentiment}\n\n💬 **Chatbot:** {answer}"
 
-    except Exception as e:
-        return f"❌ Error during API call: {str(e)}"
+
+def parse_model_output(raw_text):
+    """
+    Parses the model's JSON output. Returns (text, cacheable).
+    """
+    try:
+        data = json.loads(raw_text)
+        sentiment = data.get("sentiment", "Unknown")
+        answer = data.get("response", "Sorry, I couldn’t process that.")
+        return format_response(sentiment, answer), True
+
+    except json.JSONDecodeError:
+        # Handle plain-text fallback
+        return f"⚠️ Model returned non-JSON response:\n{raw_text}", False
 
 
 # --- Flask Routes ---
@@ -89,6 +217,12 @@ def chat():
     return jsonify({"response": bot_response})
 
 
+@app.route('/metrics')
+def metrics():
+    """Response cache hit/miss counters."""
+    return jsonify(response_cache.metrics())
+
+
 if __name__ == '__main__':
     os.makedirs('templates', exist_ok=True)
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,258 @@
+"""
+Async (ASGI) serving mode for the sentiment chatbot.
+
+Run with:  uvicorn app_async:app --host 0.0.0.0 --port 5000
+
+Reuses the Gemini client, prompt and response cache from app.py, but awaits the
+model instead of blocking a worker thread, and adds a server-sent-events
+endpoint that streams the reply as it is generated.
+"""
+
+import os
+import re
+import json
+import asyncio
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.templating import Jinja2Templates
+
+from app import (
+    client, MODEL_NAME, response_cache, normalize_message,
+    build_prompt, format_response, parse_model_output,
+)
+
+# Upper bound on simultaneous upstream Gemini calls across all connections
+MAX_UPSTREAM_CALLS = int(os.getenv("CHAT_MAX_UPSTREAM_CALLS", "16"))
+upstream_slots = asyncio.Semaphore(MAX_UPSTREAM_CALLS)
+
+templates = Jinja2Templates(directory="templates")
+
+
+# --- Incremental JSON field extraction ---
+SENTIMENT_RE = re.compile(r"""["']sentiment["']\s*:\s*["']([^"']*)["']""")
+RESPONSE_START_RE = re.compile(r"""["']response["']\s*:\s*(["'])""")
+
+
+class PartialReplyParser:
+    """
+    Pulls 'sentiment' and the text of 'response' out of a JSON reply while it is
+    still being streamed, so both can be forwarded before the JSON is complete.
+    """
+
+    def __init__(self):
+        self.raw = ""
+        self.sentiment = None
+        self.emitted = ""
+        self.response_closed = False
+
+    def feed(self, chunk):
+        """Adds a chunk; returns (new_sentiment_or_None, new_response_text)."""
+        self.raw += chunk
+        new_sentiment = None
+        if self.sentiment is None:
+            m = SENTIMENT_RE.search(self.raw)
+            if m:
+                self.sentiment = new_sentiment = m.group(1)
+
+        text = self._response_so_far()
+        delta = text[len(self.emitted):] if text is not None else ""
+        if delta:
+            self.emitted = text
+        return new_sentiment, delta
+
+    def _response_so_far(self):
+        m = RESPONSE_START_RE.search(self.raw)
+        if not m:
+            return None
+        quote, body = m.group(1), self.raw[m.end():]
+
+        # Cut at the closing quote, or drop a trailing escape that isn't complete yet
+        i, end = 0, len(body)
+        while i < len(body):
+            c = body[i]
+            if c == "\\":
+                width = 6 if body[i + 1:i + 2] == "u" else 2
+                if i + width > len(body):
+                    end = i
+                    break
+                i += width
+                continue
+            if c == quote:
+                end = i
+                self.response_closed = True
+                break
+            i += 1
+        body = body[:end]
+
+        if quote == "'":
+            body = body.replace('"', '\\"').replace("\\'", "'")
+        try:
+            return json.loads(f'"{body}"')
+        except json.JSONDecodeError:
+            return body
+
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+# --- Request coalescing on the shared response cache ---
+async def wait_for(future):
+    """Awaits another request's in-flight result without cancelling it for everyone else."""
+    return await asyncio.shield(asyncio.wrap_future(future))
+
+
+def abandon(key, error):
+    """Releases an in-flight key whose owner failed or was cancelled (e.g. the client left)."""
+    if not isinstance(error, Exception):
+        # Don't hand CancelledError / GeneratorExit to waiters that weren't cancelled
+        error = RuntimeError("the request computing this reply was cancelled")
+    response_cache.fail(key, error)
+
+
+async def get_or_compute_async(key, compute):
+    """
+    Awaitable ResponseCache.get_or_compute: compute() is a coroutine returning
+    (value, cacheable). Concurrent identical requests share one upstream call.
+    """
+    cached, future, owner = response_cache.begin(key)
+    if future is None:
+        return cached
+    if not owner:
+        return await wait_for(future)
+
+    try:
+        value, cacheable = await compute()
+    except BaseException as e:
+        abandon(key, e)
+        raise
+    response_cache.finish(key, value, cacheable)
+    return value
+
+
+# --- Chatbot Core (async) ---
+async def get_chatbot_response_async(user_message):
+    if not client:
+        return "⚠️ Gemini client not initialized properly."
+
+    key = (MODEL_NAME, normalize_message(user_message))
+    try:
+        return await get_or_compute_async(key, lambda: _generate_response_async(user_message))
+    except Exception as e:
+        return f"❌ Error during API call: {str(e)}"
+
+
+async def _generate_response_async(user_message):
+    """Async twin of app._generate_response: returns (text, cacheable)."""
+    try:
+        async with upstream_slots:
+            response = await client.aio.models.generate_content(
+                model=MODEL_NAME,
+                contents=build_prompt(user_message)
+            )
+        return parse_model_output(response.text.strip())
+    except Exception as e:
+        return f"❌ Error during API call: {str(e)}", False
+
+
+async def stream_chatbot_response(user_message):
+    """
+    Yields SSE events: 'sentiment' (as soon as it is parsed), 'token' (response
+    text deltas), then 'done' with the full formatted reply, or 'error'.
+
+    A cache hit, or an identical request already streaming from upstream, gives a
+    single 'done' event with "cached": true and no tokens.
+    """
+    if not client:
+        yield sse("error", {"message": "⚠️ Gemini client not initialized properly."})
+        return
+
+    key = (MODEL_NAME, normalize_message(user_message))
+    cached, future, owner = response_cache.begin(key)
+    if not owner:
+        try:
+            text = cached if future is None else await wait_for(future)
+        except Exception as e:
+            yield sse("error", {"message": f"❌ Error during API call: {str(e)}"})
+            return
+        yield sse("done", {"response": text, "cached": True})
+        return
+
+    parser = PartialReplyParser()
+    try:
+        async with upstream_slots:
+            stream = await client.aio.models.generate_content_stream(
+                model=MODEL_NAME,
+                contents=build_prompt(user_message)
+            )
+            async for chunk in stream:
+                sentiment, delta = parser.feed(chunk.text or "")
+                if sentiment is not None:
+                    yield sse("sentiment", {"sentiment": sentiment})
+                if delta:
+                    yield sse("token", {"text": delta})
+    except Exception as e:
+        response_cache.fail(key, e)
+        yield sse("error", {"message": f"❌ Error during API call: {str(e)}"})
+        return
+    except BaseException as e:
+        # Client disconnected mid-stream (GeneratorExit) or the task was cancelled
+        abandon(key, e)
+        raise
+
+    text, cacheable = parse_model_output(parser.raw.strip())
+    if not cacheable and parser.sentiment is not None and parser.emitted:
+        # Tolerate replies that aren't strict JSON (e.g. single quotes or code fences),
+        # but only cache one whose response string was read up to its closing quote
+        text, cacheable = format_response(parser.sentiment, parser.emitted), parser.response_closed
+    response_cache.finish(key, text, cacheable)
+    yield sse("done", {"response": text, "cached": False})
+
+
+# --- Routes ---
+async def index(request):
+    """Main chat page."""
+    return templates.TemplateResponse(request, "index.html")
+
+
+async def chat(request):
+    """Same contract as the Flask /chat route."""
+    user_message = (await request.json()).get("message", "")
+    if not user_message:
+        return JSONResponse({"response": "Please enter a message."})
+    return JSONResponse({"response": await get_chatbot_response_async(user_message)})
+
+
+async def chat_stream(request):
+    """Server-sent events stream of the reply."""
+    user_message = (await request.json()).get("message", "")
+    if not user_message:
+        return JSONResponse({"response": "Please enter a message."}, status_code=400)
+    return StreamingResponse(
+        stream_chatbot_response(user_message),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def metrics(request):
+    """Response cache hit/miss counters."""
+    return JSONResponse({
+        **response_cache.metrics(),
+        "upstream_limit": MAX_UPSTREAM_CALLS,
+    })
+
+
+app = Starlette(routes=[
+    Route("/", index),
+    Route("/chat", chat, methods=["POST"]),
+    Route("/chat/stream", chat_stream, methods=["POST"]),
+    Route("/metrics", metrics),
+])
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=5000)
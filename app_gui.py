@@ -1,9 +1,12 @@
 import numpy as np
+import queue, threading
+from collections import deque
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from tkinter import ttk
 
 import joblib, librosa, sounddevice as sd, wavio, os
+from ser_features import MFCCFeaturizer, predict_with_confidence
 
 # --- Config ---
 MODEL_PATH = "models/ser_svm.joblib"
@@ -12,20 +15,18 @@ EMOJI = {
     "angry":"😡", "fearful":"😨", "disgust":"🤢", "surprised":"😮"
 }
 
+# Live streaming mode
+STREAM_HOP = 0.5          # Seconds between rolling predictions
+STREAM_BLOCK = 1024       # Samples per sounddevice callback
+
 bundle = joblib.load(MODEL_PATH)
 pipe = bundle["pipeline"]
 SR = bundle["sr"]; DUR = bundle["dur"]; N_MFCC = bundle["n_mfcc"]
+FEATURIZER = MFCCFeaturizer(SR, DUR, N_MFCC)
+extract_features = FEATURIZER.extract_features
+N_FFT, HOP_LENGTH = FEATURIZER.n_fft, FEATURIZER.hop_length
 
 # --- Functions ---
-def extract_features(y, sr):
-    target_len = int(SR * DUR)
-    if len(y) < target_len:
-        y = np.pad(y, (0, target_len - len(y)))
-    else:
-        y = y[:target_len]
-    mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=N_MFCC)
-    return np.mean(mfcc, axis=1)
-
 def record_to_wav(path="live.wav", duration=DUR, fs=SR):
     try:
         msg.set("Recording... Speak now 🎤")
@@ -45,9 +46,130 @@ def record_to_wav(path="live.wav", duration=DUR, fs=SR):
 def predict_from_wav(path):
     y, sr = librosa.load(path, sr=SR, mono=True)
     feats = extract_features(y, sr).reshape(1, -1)
-    pred = pipe.predict(feats)[0]
-    prob = pipe.predict_proba(feats)[0].max()
-    return pred, float(prob)
+    pred, prob = predict_with_confidence(pipe, feats)
+    return pred[0], float(prob[0])
+
+class StreamingDetector:
+    """Continuous mic input -> rolling emotion label, computed off the Tk thread.
+
+    The sounddevice callback only copies blocks into a bounded queue. A worker
+    thread turns new samples into log-mel frames as they arrive (no recompute
+    of the whole window) and keeps the last DUR seconds of them. Every
+    STREAM_HOP seconds the window is clamped to top_db below its own peak, as
+    a recorded clip would be, turned into MFCCs and averaged, and
+    (label, confidence) is published to `results`.
+    """
+
+    def __init__(self, sr=SR, window=DUR, hop=STREAM_HOP):
+        self.sr = sr
+        self.hop_samples = int(hop * sr)
+        self.window_frames = 1 + int(window * sr) // HOP_LENGTH
+        # About one hop of audio: beyond that, predictions would lag the speaker
+        self.blocks = queue.Queue(maxsize=max(1, round(self.hop_samples / STREAM_BLOCK)))
+        self.results = queue.Queue()
+        self.frames = deque(maxlen=self.window_frames)
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.dropped = 0
+        self._stop = threading.Event()
+        self._stream = None
+        self._worker = None
+
+    def _callback(self, indata, frames, time_info, status):
+        try:
+            self.blocks.put_nowait(indata[:, 0].copy())
+        except queue.Full:
+            # Worker is behind; drop audio rather than let latency grow
+            self.dropped += 1
+
+    def _add_samples(self, x):
+        self.pending = np.concatenate([self.pending, x])
+        if len(self.pending) < N_FFT:
+            return
+        n = 1 + (len(self.pending) - N_FFT) // HOP_LENGTH
+        used = N_FFT + (n - 1) * HOP_LENGTH
+        # Unclamped: the top_db floor must be relative to the whole window, not this chunk
+        log_mel = FEATURIZER.log_mel_frames(self.pending[None, :used], center=False, clamp=False)[0]
+        self.frames.extend(log_mel)
+        self.pending = self.pending[n * HOP_LENGTH:]
+
+    def _run(self):
+        since_pred = 0
+        while not self._stop.is_set():
+            try:
+                x = self.blocks.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self._add_samples(x)
+            since_pred += len(x)
+            if since_pred >= self.hop_samples and len(self.frames) >= self.window_frames // 2:
+                since_pred = 0
+                mfcc = FEATURIZER.mfcc_from_log_mel(np.asarray(self.frames)[None])[0]
+                feats = mfcc.mean(axis=1).reshape(1, -1)
+                pred, prob = predict_with_confidence(pipe, feats)
+                self.results.put((pred[0], float(prob[0])))
+
+    def start(self):
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+        self._stream = sd.InputStream(samplerate=self.sr, channels=1, dtype="float32",
+                                      blocksize=STREAM_BLOCK, callback=self._callback)
+        self._stream.start()
+
+    def stop(self):
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join(timeout=1)
+            self._worker = None
+
+streamer = None
+poll_job = None   # root.after id of the pending poll_stream call
+
+def poll_stream():
+    global poll_job
+    poll_job = None
+    if streamer is None:
+        return
+    latest = None
+    while True:
+        try:
+            latest = streamer.results.get_nowait()
+        except queue.Empty:
+            break
+    if latest:
+        label, p = latest
+        result.set(f"{label} {EMOJI.get(label,'')}")
+        msg.set(f"Live - Confidence: {p:.2f}")
+    poll_job = root.after(100, poll_stream)
+
+def on_toggle_stream():
+    global streamer, poll_job
+    if streamer is None:
+        try:
+            streamer = StreamingDetector()
+            streamer.start()
+        except Exception as e:
+            streamer = None
+            messagebox.showerror("Mic Error", str(e))
+            return
+        btn_live.config(text="⏹ Stop Live")
+        msg.set("Listening... 🎧")
+        progress.start(10)
+        if poll_job is None:
+            poll_job = root.after(100, poll_stream)
+    else:
+        streamer.stop()
+        streamer = None
+        if poll_job is not None:
+            root.after_cancel(poll_job)
+            poll_job = None
+        btn_live.config(text="🔴 Live Stream")
+        progress.stop()
+        msg.set("Stopped.")
 
 def on_record_and_predict():
     wav_path = record_to_wav()
@@ -71,7 +193,7 @@ def on_open_file():
 # --- Tkinter UI ---
 root = tk.Tk()
 root.title("🎤 Live Emotion Detector")
-root.geometry("450x380")
+root.geometry("450x430")
 root.config(bg="#1e1e2f")
 
 # Title
@@ -92,6 +214,8 @@ btn_rec = tk.Button(frame_btn, text="🎤 Record 5s & Predict", command=on_recor
 btn_rec.grid(row=0, column=0, padx=10, pady=5)
 btn_file = tk.Button(frame_btn, text="📁 Pick WAV & Predict", command=on_open_file, font=("Segoe UI", 12), bg="#4caf50", fg="white", width=20)
 btn_file.grid(row=0, column=1, padx=10, pady=5)
+btn_live = tk.Button(frame_btn, text="🔴 Live Stream", command=on_toggle_stream, font=("Segoe UI", 12), bg="#3f51b5", fg="white", width=20)
+btn_live.grid(row=1, column=0, columnspan=2, padx=10, pady=5)
 
 # Status / message
 msg = tk.StringVar(value="Ready.")
@@ -0,0 +1,130 @@
+import os, sys, csv, json, glob, argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import librosa, joblib
+from ser_features import MFCCFeaturizer, predict_with_confidence
+
+# --- Config ---
+MODEL_PATH = "models/ser_svm.joblib"
+BATCH_SIZE = 256
+N_JOBS = os.cpu_count() or 1
+SUB_BATCH = 32   # Clips featurized together per worker task
+
+# Set per worker process by init_worker()
+SR = None
+FEATURIZER = None
+
+def init_worker(sr, dur, n_mfcc):
+    global SR, FEATURIZER
+    SR = sr
+    FEATURIZER = MFCCFeaturizer(sr, dur, n_mfcc)
+
+# Decode a chunk of files and featurize the readable ones as one batch.
+# Errors are returned, not raised, so one bad file doesn't stop the run.
+def featurize_files(paths):
+    clips, results = [], []
+    for p in paths:
+        try:
+            clips.append(librosa.load(p, sr=SR, mono=True)[0])
+            results.append([p, None, None])
+        except Exception as e:
+            results.append([p, None, str(e)])
+    if clips:
+        feats = iter(FEATURIZER(clips))
+        for r in results:
+            if r[2] is None:
+                r[1] = next(feats)
+    return [tuple(r) for r in results]
+
+# Expand directories / list files (one path per line) into WAV paths, lazily
+def iter_wavs(inputs):
+    for item in inputs:
+        if os.path.isdir(item):
+            yield from sorted(glob.glob(os.path.join(item, "**", "*.wav"), recursive=True))
+        elif item.lower().endswith(".wav"):
+            yield item
+        else:
+            with open(item) as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        yield line
+
+def batched(it, n):
+    batch = []
+    for x in it:
+        batch.append(x)
+        if len(batch) == n:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+# Score feature rows with one predict/predict_proba call per batch (same labels as app_gui)
+def score_batch(pipe, feats):
+    return predict_with_confidence(pipe, np.vstack(feats))
+
+class RowWriter:
+    """Writes result rows as CSV or JSONL depending on the output file extension."""
+
+    FIELDS = ["path", "label", "confidence", "error"]
+
+    def __init__(self, path):
+        self.f = open(path, "w", newline="") if path != "-" else sys.stdout
+        self.jsonl = path.endswith(".jsonl")
+        if not self.jsonl:
+            self.csv = csv.DictWriter(self.f, fieldnames=self.FIELDS)
+            self.csv.writeheader()
+
+    def write(self, row):
+        if self.jsonl:
+            self.f.write(json.dumps(row) + "\n")
+        else:
+            self.csv.writerow(row)
+
+    def close(self):
+        if self.f is not sys.stdout:
+            self.f.close()
+
+def run(inputs, out, model_path=MODEL_PATH, batch_size=BATCH_SIZE, n_jobs=N_JOBS):
+    bundle = joblib.load(model_path)
+    pipe = bundle["pipeline"]
+    params = (bundle["sr"], bundle["dur"], bundle["n_mfcc"])
+    init_worker(*params)
+
+    writer = RowWriter(out)
+    n_ok = n_err = 0
+    ex = ProcessPoolExecutor(n_jobs, initializer=init_worker, initargs=params) if n_jobs > 1 else None
+    try:
+        for paths in batched(iter_wavs(inputs), batch_size):
+            chunks = [paths[i:i + SUB_BATCH] for i in range(0, len(paths), SUB_BATCH)]
+            results = [r for rs in (ex.map(featurize_files, chunks) if ex else map(featurize_files, chunks)) for r in rs]
+            good = [(p, f) for p, f, err in results if err is None]
+            if good:
+                labels, confs = score_batch(pipe, [f for _, f in good])
+                for (p, _), label, c in zip(good, labels, confs):
+                    writer.write({"path": p, "label": str(label), "confidence": round(float(c), 4), "error": ""})
+            for p, _, err in results:
+                if err is not None:
+                    writer.write({"path": p, "label": "", "confidence": "", "error": err})
+            n_ok += len(good)
+            n_err += len(results) - len(good)
+            print(f"Scored {n_ok} files ({n_err} errors)", file=sys.stderr)
+    finally:
+        if ex:
+            ex.shutdown()
+        writer.close()
+    return n_ok, n_err
+
+def main():
+    ap = argparse.ArgumentParser(description="Batch speech-emotion scoring with the trained SVM bundle.")
+    ap.add_argument("inputs", nargs="+", help="WAV files, directories, or text files listing WAV paths")
+    ap.add_argument("-o", "--out", default="-", help="Output .csv or .jsonl file (default: CSV to stdout)")
+    ap.add_argument("--model", default=MODEL_PATH)
+    ap.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    ap.add_argument("--jobs", type=int, default=N_JOBS, help="Decode/featurize worker processes")
+    args = ap.parse_args()
+    run(args.inputs, args.out, args.model, args.batch_size, args.jobs)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Training data loading for Katha-GPT.
+
+MemmapLoader keeps train.bin / validation.bin open as a memmap, gathers each
+batch with a single fancy index into a sliding-window view, and prefetches the
+next batches on a background thread. Batch k is a pure function of (seed, k)
+(and the process rank under DDP, so each rank sees different data), so a loader
+can be seeked to any step when training resumes.
+"""
+
+import queue
+import threading
+import numpy as np
+import torch
+
+
+class SeekableSampler:
+    """Deterministic random window offsets: batch `step` depends only on (seed, step, rank)."""
+
+    def __init__(self, num_windows, batch_size, seed=1337, rank=0):
+        self.num_windows = num_windows
+        self.batch_size = batch_size
+        self.seed = seed
+        self.rank = rank
+
+    def offsets(self, step):
+        # Rank 0 keeps the single-process stream, so existing resumes are unaffected
+        key = [self.seed, step] + ([self.rank] if self.rank else [])
+        rng = np.random.default_rng(key)
+        return rng.integers(0, self.num_windows, size=self.batch_size)
+
+
+class MemmapLoader:
+    """
+    Batches of (x, y) token windows from a uint16 memmap, prefetched on a thread.
+
+    Call next() for each batch; state_dict()/load_state_dict() (or seek()) record and
+    restore the position so resumed runs see the same stream of batches.
+    """
+
+    def __init__(self, path, block_size, batch_size, device, seed=1337, prefetch=4, start_step=0, rank=0):
+        self.path = path
+        self.block_size = block_size
+        self.device = device
+        self.prefetch = prefetch
+
+        self.data = np.memmap(path, dtype=np.uint16, mode='r')
+        # (num_windows, block_size + 1) strided view; no data is copied
+        self.windows = np.lib.stride_tricks.sliding_window_view(self.data, block_size + 1)
+        self.sampler = SeekableSampler(len(self.data) - block_size, batch_size, seed, rank)
+
+        self.step = start_step
+        self._queue = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def gather(self, step):
+        """CPU tensors (x, y) for batch `step`."""
+        rows = self.windows[self.sampler.offsets(step)].astype(np.int64)
+        x = torch.from_numpy(np.ascontiguousarray(rows[:, :-1]))
+        y = torch.from_numpy(np.ascontiguousarray(rows[:, 1:]))
+        if 'cuda' in str(self.device):
+            x, y = x.pin_memory(), y.pin_memory()
+        return x, y
+
+    def _worker(self, step, q, stop):
+        while not stop.is_set():
+            try:
+                item = (step, self.gather(step))
+            except Exception as e:
+                # Hand the error to next() instead of dying silently and leaving it blocked
+                item = (step, e)
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            if isinstance(item[1], Exception):
+                return
+            step += 1
+
+    def _start(self):
+        self._stop = threading.Event()
+        self._queue = queue.Queue(maxsize=self.prefetch)
+        self._thread = threading.Thread(target=self._worker, args=(self.step, self._queue, self._stop), daemon=True)
+        self._thread.start()
+
+    def next(self):
+        if self.prefetch <= 0:
+            x, y = self.gather(self.step)
+        else:
+            if self._thread is None:
+                self._start()
+            step, batch = self._queue.get()
+            assert step == self.step
+            if isinstance(batch, Exception):
+                # The worker has exited; a later next() retries from this step
+                self.close()
+                raise batch
+            x, y = batch
+        self.step += 1
+        non_blocking = 'cuda' in str(self.device)
+        return x.to(self.device, non_blocking=non_blocking), y.to(self.device, non_blocking=non_blocking)
+
+    __next__ = next
+
+    def __iter__(self):
+        return self
+
+    def seek(self, step):
+        """Continue from batch `step`; discards anything already prefetched."""
+        self.close()
+        self.step = step
+
+    def state_dict(self):
+        return {'step': self.step, 'seed': self.sampler.seed}
+
+    def load_state_dict(self, state):
+        self.sampler.seed = state.get('seed', self.sampler.seed)
+        self.seek(state['step'])
+
+    def close(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self._queue = None
@@ -0,0 +1,159 @@
+"""
+CPU inference export and benchmark for Katha-GPT.
+
+Export an int8 (dynamic quantization of all Linear layers) or bf16 artifact from a
+training checkpoint. The artifact has no dropout layers and stores its own config,
+and katha_model.load_model() loads it directly, so it plugs into TextGenerator:
+
+    python katha_export.py export --weights best_model.pt --config model_config.json \
+        --format int8 --out marathi_gpt_int8.pt
+
+Compare tokens/sec, resident memory and validation perplexity against fp32
+(each variant is measured in its own process so memory numbers don't mix):
+
+    python katha_export.py bench --weights best_model.pt --config model_config.json \
+        --artifacts marathi_gpt_int8.pt marathi_gpt_bf16.pt --val validation.bin
+"""
+
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+
+import torch
+
+from katha_model import load_model, to_inference_format, config_to_dict
+from katha_trainer import BATCH_SIZE, DATA_SEED, EVAL_ITERS, eval_seed
+
+
+def export(weights, config, fmt, out):
+    model = load_model(weights, config, 'cpu')
+    model = to_inference_format(model, fmt)
+    torch.save({
+        'inference_format': fmt,
+        'config_dict': config_to_dict(model.config),
+        'model_state_dict': model.state_dict(),
+    }, out)
+    print(f"Saved {fmt} inference model to {out} ({os.path.getsize(out) / 1024**2:.1f} MB)")
+
+
+def resident_mb():
+    """Current resident set size in MB (Linux /proc, falls back to peak RSS)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024**2
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@torch.no_grad()
+def validation_loss(model, val_path, batch_size, eval_iters, data_seed=DATA_SEED):
+    """
+    Mean validation loss over a fixed, seeded set of batches (same batches for every variant).
+    With the Trainer's batch size, eval_iters and data_seed these are the batches of the
+    first estimate_loss validation pass of a single-process run.
+    """
+    from katha_data import MemmapLoader
+    loader = MemmapLoader(val_path, model.config.block_size, batch_size, 'cpu',
+                          seed=eval_seed(data_seed, 'validation'), prefetch=0)
+    losses = []
+    for _ in range(eval_iters):
+        X, Y = loader.next()
+        _, loss = model(X, Y)
+        losses.append(loss.float().item())
+    return sum(losses) / len(losses)
+
+
+@torch.no_grad()
+def measure(path, config, val_path, tokens, batch_size, eval_iters, threads):
+    """Benchmarks one model file in the current process; returns a result dict."""
+    torch.set_num_threads(threads)
+    base = resident_mb()
+    model = load_model(path, config, 'cpu')
+    loaded = resident_mb()
+
+    torch.manual_seed(0)
+    prompt = torch.randint(0, model.config.vocab_size, (1, 16))
+    model.generate_enhanced(prompt, 8)   # warm-up
+    start = time.perf_counter()
+    model.generate_enhanced(prompt, tokens)
+    tokens_per_sec = tokens / (time.perf_counter() - start)
+
+    result = {
+        'model': path,
+        'tokens_per_sec': round(tokens_per_sec, 2),
+        'model_rss_mb': round(loaded - base, 1),
+        'peak_rss_mb': round(resident_mb(), 1),
+        'file_mb': round(os.path.getsize(path) / 1024**2, 1),
+    }
+    if val_path:
+        loss = validation_loss(model, val_path, batch_size, eval_iters)
+        result['val_loss'] = round(loss, 4)
+        result['val_perplexity'] = round(math.exp(min(loss, 10)), 3)
+    return result
+
+
+def bench(weights, config, artifacts, val_path, tokens, batch_size, eval_iters, threads):
+    results = []
+    for path in [weights] + artifacts:
+        cmd = [sys.executable, __file__, '_measure', path, '--config', config,
+               '--tokens', str(tokens), '--batch-size', str(batch_size),
+               '--eval-iters', str(eval_iters), '--threads', str(threads)]
+        if val_path:
+            cmd += ['--val', val_path]
+        out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(out.strip().splitlines()[-1]))
+
+    fp32 = results[0]
+    print(f"\n{'model':<32} {'tok/s':>8} {'speedup':>8} {'RSS MB':>8} {'file MB':>8} {'val ppl':>9} {'Δppl':>8}")
+    for r in results:
+        ppl = r.get('val_perplexity')
+        delta = f"{ppl - fp32['val_perplexity']:+.3f}" if ppl is not None else '-'
+        ppl = f"{ppl:.3f}" if ppl is not None else '-'
+        print(f"{os.path.basename(r['model']):<32} {r['tokens_per_sec']:>8.1f} "
+              f"{r['tokens_per_sec'] / fp32['tokens_per_sec']:>7.2f}x {r['model_rss_mb']:>8.1f} "
+              f"{r['file_mb']:>8.1f} {ppl:>9} {delta:>8}")
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Quantized CPU inference export for Katha-GPT")
+    sub = ap.add_subparsers(dest='cmd', required=True)
+
+    ex = sub.add_parser('export', help="Write an int8 or bf16 inference artifact")
+    ex.add_argument('--weights', default='best_model.pt')
+    ex.add_argument('--config', default='model_config.json')
+    ex.add_argument('--format', choices=['int8', 'bf16'], default='int8')
+    ex.add_argument('--out', default=None)
+
+    for name in ('bench', '_measure'):
+        p = sub.add_parser(name, help="Compare fp32 against exported artifacts" if name == 'bench' else argparse.SUPPRESS)
+        if name == 'bench':
+            p.add_argument('--weights', default='best_model.pt')
+            p.add_argument('--artifacts', nargs='+', required=True)
+        else:
+            p.add_argument('path')
+        p.add_argument('--config', default='model_config.json')
+        p.add_argument('--val', default=None, help="validation.bin for the perplexity check")
+        p.add_argument('--tokens', type=int, default=128)
+        p.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Validation batch size (Trainer default)")
+        p.add_argument('--eval-iters', type=int, default=EVAL_ITERS, help="Validation batches (Trainer default)")
+        p.add_argument('--threads', type=int, default=torch.get_num_threads())
+
+    args = ap.parse_args()
+    if args.cmd == 'export':
+        export(args.weights, args.config, args.format, args.out or f'marathi_gpt_{args.format}.pt')
+    elif args.cmd == 'bench':
+        bench(args.weights, args.config, args.artifacts, args.val, args.tokens,
+              args.batch_size, args.eval_iters, args.threads)
+    else:
+        print(json.dumps(measure(args.path, args.config, args.val, args.tokens,
+                                 args.batch_size, args.eval_iters, args.threads)))
+
+
+if __name__ == "__main__":
+    main()
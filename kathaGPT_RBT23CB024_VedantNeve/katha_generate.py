@@ -0,0 +1,156 @@
+"""
+Headless story generation for Katha-GPT: no prompts, no Drive probing, no training imports.
+
+Loads model_config.json and the weights directly (fp32 checkpoints or artifacts from
+katha_export.py) and generates in batches with TextGenerator. Prompts come from argv,
+a file, or stdin; results are written as one JSON object per prompt.
+
+    python katha_generate.py "एकदा एका जंगलात एक लहान वाघ होता"
+    python katha_generate.py --prompts prompts.txt --out stories.jsonl --batch-size 16
+    cat requests.jsonl | python katha_generate.py --weights marathi_gpt_int8.pt
+
+JSONL input lines are objects with a "prompt" field and, optionally, per-request
+overrides of the generation settings (max_length, temperature, top_k, top_p,
+repetition_penalty, no_repeat_ngram_size, num_return_sequences, method, beam_width).
+
+torch, transformers and the model code are imported only after the arguments are
+parsed, so --help and argument errors return immediately.
+"""
+
+import argparse
+import json
+import os
+import sys
+from contextlib import redirect_stdout
+
+TOKENIZER_NAME = "l3cube-pune/marathi-gpt"
+MODEL_DIR = os.getenv("KATHA_MODEL_DIR", ".")
+
+GENERATION_KEYS = ("max_length", "temperature", "top_k", "top_p", "repetition_penalty",
+                   "no_repeat_ngram_size", "num_return_sequences", "method", "beam_width")
+
+
+def parse_line(line, path=None):
+    """A prompt line is JSON when it looks like a JSON object, otherwise plain text."""
+    if line.startswith('{') or (path or '').endswith('.jsonl'):
+        record = json.loads(line)
+        if 'prompt' not in record:
+            raise ValueError(f"JSONL record without 'prompt': {line[:80]}")
+        return record
+    return {'prompt': line}
+
+
+def read_requests(args):
+    """Yields request dicts from argv, --prompts FILE, or stdin (in that order of preference)."""
+    if args.prompt:
+        for prompt in args.prompt:
+            yield {'prompt': prompt}
+        return
+
+    if args.prompts and args.prompts != '-':
+        f = open(args.prompts, 'r', encoding='utf-8')
+    else:
+        f = sys.stdin
+    with f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield parse_line(line, args.prompts)
+
+
+def settings_for(record, defaults):
+    return tuple(record.get(k, defaults[k]) for k in GENERATION_KEYS)
+
+
+def batches(requests, batch_size, defaults):
+    """Groups consecutive requests with identical settings into batches of up to batch_size."""
+    batch, key = [], None
+    for record in requests:
+        k = settings_for(record, defaults)
+        if batch and (k != key or len(batch) == batch_size):
+            yield key, batch
+            batch = []
+        batch.append(record)
+        key = k
+    if batch:
+        yield key, batch
+
+
+def run_batch(generator, settings, prompts):
+    s = dict(zip(GENERATION_KEYS, settings))
+    if s['method'] == 'beam':
+        return [[text] for text in generator.beam_search_batch(prompts, s['beam_width'], s['max_length'])]
+    return generator.generate_batch(
+        prompts,
+        max_length=s['max_length'],
+        temperature=s['temperature'],
+        top_k=s['top_k'],
+        top_p=s['top_p'],
+        repetition_penalty=s['repetition_penalty'],
+        no_repeat_ngram_size=s['no_repeat_ngram_size'],
+        num_return_sequences=s['num_return_sequences']
+    )
+
+
+def load_generator(weights, config, tokenizer_name, device, threads=None):
+    import torch
+    from transformers import AutoTokenizer
+    from katha_model import TextGenerator, load_model
+
+    if threads:
+        torch.set_num_threads(threads)
+    if device == 'auto':
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    # Keep stdout clean for JSONL output
+    with redirect_stdout(sys.stderr):
+        tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+        model = load_model(weights, config, device)
+    return TextGenerator(model, tokenizer, device)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Headless Marathi story generation")
+    ap.add_argument("prompt", nargs="*", help="Prompts; if omitted, read from --prompts or stdin")
+    ap.add_argument("--prompts", default=None, help="Text file (one prompt per line) or .jsonl; '-' for stdin")
+    ap.add_argument("--out", default="-", help="Output JSONL (default: stdout)")
+    ap.add_argument("--text", action="store_true", help="Print only the generated text, one story per line")
+    ap.add_argument("--weights", default=os.path.join(MODEL_DIR, "best_model.pt"))
+    ap.add_argument("--config", default=os.path.join(MODEL_DIR, "model_config.json"))
+    ap.add_argument("--tokenizer", default=TOKENIZER_NAME)
+    ap.add_argument("--device", default="auto")
+    ap.add_argument("--threads", type=int, default=None, help="torch CPU threads")
+    ap.add_argument("--batch-size", type=int, default=16, help="Prompts per batch")
+    ap.add_argument("--method", choices=["sample", "beam"], default="sample")
+    ap.add_argument("--num-return-sequences", type=int, default=1)
+    ap.add_argument("--beam-width", type=int, default=3)
+    ap.add_argument("--max-length", type=int, default=200)
+    ap.add_argument("--temperature", type=float, default=0.8)
+    ap.add_argument("--top-k", type=int, default=50)
+    ap.add_argument("--top-p", type=float, default=0.9)
+    ap.add_argument("--repetition-penalty", type=float, default=1.2)
+    ap.add_argument("--no-repeat-ngram-size", type=int, default=3)
+    args = ap.parse_args()
+
+    if not args.prompt and args.prompts is None and sys.stdin.isatty():
+        ap.error("no prompts given (pass them as arguments, with --prompts, or on stdin)")
+
+    defaults = {k: getattr(args, k) for k in GENERATION_KEYS}
+    generator = load_generator(args.weights, args.config, args.tokenizer, args.device, args.threads)
+
+    out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8")
+    try:
+        for settings, records in batches(read_requests(args), args.batch_size, defaults):
+            prompts = [r['prompt'] for r in records]
+            for record, generations in zip(records, run_batch(generator, settings, prompts)):
+                if args.text:
+                    out.write("\n".join(g.replace("\n", " ") for g in generations) + "\n")
+                else:
+                    out.write(json.dumps({**record, "generations": generations}, ensure_ascii=False) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,594 @@
+"""
+Katha-GPT model definition.
+
+Kept separate from katha_gpt.py (the training notebook script) so the model and
+generation code can be imported without running data preparation or training.
+"""
+
+import json
+import math
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from dataclasses import dataclass, fields
+
+
+@dataclass
+class GPTConfig:
+    """Configuration for GPT model"""
+    block_size: int = 256      # Context window
+    vocab_size: int = 50257    # Vocabulary size
+    n_layer: int = 8           # Number of transformer layers
+    n_head: int = 8            # Number of attention heads
+    n_embd: int = 512          # Embedding dimension
+    dropout: float = 0.1       # Dropout rate
+    bias: bool = True          # Use bias in layers
+
+class LayerNorm(nn.Module):
+    """LayerNorm with optional bias"""
+    def __init__(self, ndim, bias):
+        super().__init__()
+        self.weight = nn.Parameter(torch.ones(ndim))
+        self.bias = nn.Parameter(torch.zeros(ndim)) if bias else None
+
+    def forward(self, x):
+        return F.layer_norm(x, self.weight.shape, self.weight, self.bias, 1e-5)
+
+class MultiHeadAttention(nn.Module):
+    """Multi-Head Attention with Flash Attention support"""
+    def __init__(self, config):
+        super().__init__()
+        assert config.n_embd % config.n_head == 0
+
+        self.n_head = config.n_head
+        self.n_embd = config.n_embd
+        self.dropout = config.dropout
+
+        self.c_attn = nn.Linear(config.n_embd, 3 * config.n_embd, bias=config.bias)
+        self.c_proj = nn.Linear(config.n_embd, config.n_embd, bias=config.bias)
+
+        self.attn_dropout = nn.Dropout(config.dropout)
+        self.resid_dropout = nn.Dropout(config.dropout)
+
+        self.flash = hasattr(F, 'scaled_dot_product_attention')
+        if not self.flash:
+            self.register_buffer("mask", torch.tril(torch.ones(config.block_size, config.block_size))
+                                       .view(1, 1, config.block_size, config.block_size))
+
+    def forward(self, x, layer_past=None, use_cache=False, attn_mask=None):
+        """
+        layer_past: optional (k, v) from earlier positions, each (B, n_head, T_past, head_dim).
+        attn_mask: optional bool mask broadcastable to (B, n_head, T, T_past + T), True = attend;
+                   replaces the built-in causal mask (used for left-padded batches).
+        With use_cache=True returns (y, (k, v)) so the caller can extend the cache.
+        """
+        B, T, C = x.size()
+
+        q, k, v = self.c_attn(x).split(self.n_embd, dim=2)
+        k = k.view(B, T, self.n_head, C // self.n_head).transpose(1, 2)
+        q = q.view(B, T, self.n_head, C // self.n_head).transpose(1, 2)
+        v = v.view(B, T, self.n_head, C // self.n_head).transpose(1, 2)
+
+        if layer_past is not None:
+            past_k, past_v = layer_past
+            k = torch.cat((past_k, k), dim=2)
+            v = torch.cat((past_v, v), dim=2)
+        T_total = k.size(2)
+        T_past = T_total - T
+
+        if self.flash:
+            if attn_mask is not None:
+                is_causal = False
+            elif T_past == 0:
+                attn_mask, is_causal = None, True
+            elif T == 1:
+                # A single new query may attend to every cached position
+                attn_mask, is_causal = None, False
+            else:
+                attn_mask = torch.ones(T, T_total, dtype=torch.bool, device=x.device).tril(diagonal=T_past)
+                is_causal = False
+            y = F.scaled_dot_product_attention(
+                q, k, v, attn_mask=attn_mask,
+                dropout_p=self.dropout if self.training else 0.0,
+                is_causal=is_causal
+            )
+        else:
+            att = (q @ k.transpose(-2, -1)) * (1.0 / math.sqrt(k.size(-1)))
+            if attn_mask is None:
+                attn_mask = self.mask[:, :, T_past:T_total, :T_total] != 0
+            att = att.masked_fill(~attn_mask, float('-inf'))
+            att = F.softmax(att, dim=-1)
+            att = self.attn_dropout(att)
+            y = att @ v
+
+        y = y.transpose(1, 2).contiguous().view(B, T, C)
+        y = self.resid_dropout(self.c_proj(y))
+        if use_cache:
+            return y, (k, v)
+        return y
+
+class FeedForward(nn.Module):
+    """Feed-Forward Network"""
+    def __init__(self, config):
+        super().__init__()
+        hidden_dim = 4 * config.n_embd
+        self.c_fc = nn.Linear(config.n_embd, hidden_dim, bias=config.bias)
+        self.c_proj = nn.Linear(hidden_dim, config.n_embd, bias=config.bias)
+        self.dropout = nn.Dropout(config.dropout)
+        self.activation = nn.GELU()
+
+    def forward(self, x):
+        x = self.activation(self.c_fc(x))
+        x = self.c_proj(x)
+        x = self.dropout(x)
+        return x
+
+class TransformerBlock(nn.Module):
+    """Transformer block"""
+    def __init__(self, config):
+        super().__init__()
+        self.ln1 = LayerNorm(config.n_embd, config.bias)
+        self.attn = MultiHeadAttention(config)
+        self.ln2 = LayerNorm(config.n_embd, config.bias)
+        self.ffn = FeedForward(config)
+
+    def forward(self, x, layer_past=None, use_cache=False, attn_mask=None):
+        if use_cache:
+            a, present = self.attn(self.ln1(x), layer_past=layer_past, use_cache=True, attn_mask=attn_mask)
+            x = x + a
+            x = x + self.ffn(self.ln2(x))
+            return x, present
+        x = x + self.attn(self.ln1(x))
+        x = x + self.ffn(self.ln2(x))
+        return x
+
+class RepetitionTracker:
+    """
+    Incremental state for the repetition penalty and n-gram blocking in generation.
+
+    Instead of scanning the vocabulary and re-listing past n-grams every step,
+    it keeps a (B, vocab) mask of generated tokens and, per row, a map from each
+    (n-1)-token prefix to the next tokens already seen after it. Each step then
+    costs one masked divide plus one index_put over the banned tokens.
+    """
+    def __init__(self, batch_size, vocab_size, no_repeat_ngram_size, device):
+        self.n = no_repeat_ngram_size
+        self.seen = torch.zeros(batch_size, vocab_size, dtype=torch.bool, device=device)
+        self.history = [[] for _ in range(batch_size)]
+        self.banned = [{} for _ in range(batch_size)]
+        self.device = device
+
+    def update(self, next_tokens):
+        """Record one new token per row; next_tokens has shape (B,) or (B, 1)."""
+        next_tokens = next_tokens.view(-1)
+        self.seen[torch.arange(next_tokens.size(0), device=self.seen.device), next_tokens] = True
+        if self.n <= 0:
+            return
+        for hist, banned, tok in zip(self.history, self.banned, next_tokens.tolist()):
+            hist.append(tok)
+            if len(hist) >= self.n:
+                prefix = tuple(hist[len(hist) - self.n:-1])
+                banned.setdefault(prefix, set()).add(tok)
+
+    def apply(self, logits, repetition_penalty):
+        if repetition_penalty != 1.0:
+            logits = torch.where(self.seen, logits / repetition_penalty, logits)
+
+        if self.n > 0:
+            rows, cols = [], []
+            for b, (hist, banned) in enumerate(zip(self.history, self.banned)):
+                if len(hist) < self.n - 1:
+                    continue
+                blocked = banned.get(tuple(hist[len(hist) - self.n + 1:]))
+                if blocked:
+                    rows.extend([b] * len(blocked))
+                    cols.extend(blocked)
+            if rows:
+                logits = logits.index_put(
+                    (torch.tensor(rows, device=logits.device), torch.tensor(cols, device=logits.device)),
+                    torch.tensor(float('-inf'), dtype=logits.dtype, device=logits.device)
+                )
+        return logits
+
+
+class GPTModel(nn.Module):
+    """GPT Language Model"""
+    def __init__(self, config):
+        super().__init__()
+        self.config = config
+
+        self.transformer = nn.ModuleDict(dict(
+            wte=nn.Embedding(config.vocab_size, config.n_embd),
+            wpe=nn.Embedding(config.block_size, config.n_embd),
+            drop=nn.Dropout(config.dropout),
+            h=nn.ModuleList([TransformerBlock(config) for _ in range(config.n_layer)]),
+            ln_f=LayerNorm(config.n_embd, config.bias),
+        ))
+
+        self.lm_head = nn.Linear(config.n_embd, config.vocab_size, bias=False)
+        self.transformer.wte.weight = self.lm_head.weight
+
+        self.apply(self._init_weights)
+
+        for pn, p in self.named_parameters():
+            if pn.endswith('c_proj.weight'):
+                nn.init.normal_(p, mean=0.0, std=0.02/math.sqrt(2 * config.n_layer))
+
+        print(f"\nModel initialized with {self.get_num_params()/1e6:.2f}M parameters")
+
+    def get_num_params(self):
+        return sum(p.numel() for p in self.parameters())
+
+    def _init_weights(self, module):
+        if isinstance(module, nn.Linear):
+            nn.init.normal_(module.weight, mean=0.0, std=0.02)
+            if module.bias is not None:
+                nn.init.zeros_(module.bias)
+        elif isinstance(module, nn.Embedding):
+            nn.init.normal_(module.weight, mean=0.0, std=0.02)
+
+    def forward(self, idx, targets=None):
+        device = idx.device
+        b, t = idx.size()
+        assert t <= self.config.block_size, f"Sequence length {t} exceeds block size {self.config.block_size}"
+
+        pos = torch.arange(0, t, dtype=torch.long, device=device)
+        tok_emb = self.transformer.wte(idx)
+        pos_emb = self.transformer.wpe(pos)
+        x = self.transformer.drop(tok_emb + pos_emb)
+
+        for block in self.transformer.h:
+            x = block(x)
+
+        x = self.transformer.ln_f(x)
+
+        if targets is not None:
+            logits = self.lm_head(x)
+            loss = F.cross_entropy(logits.view(-1, logits.size(-1)), targets.view(-1))
+            return logits, loss
+        else:
+            logits = self.lm_head(x[:, [-1], :])
+            return logits, None
+
+    @torch.no_grad()
+    def forward_cached(self, idx, past_key_values=None, attention_mask=None):
+        """
+        Inference forward over only the new tokens `idx`, reusing per-layer (k, v)
+        from earlier calls. Returns (logits for the last position, new past_key_values).
+
+        attention_mask: optional (B, T_past + T) with 1 for real tokens and 0 for left
+        padding; positions then count real tokens only and padding is never attended to.
+        """
+        b, t = idx.size()
+        past_len = past_key_values[0][0].size(2) if past_key_values is not None else 0
+        assert past_len + t <= self.config.block_size, \
+            f"Sequence length {past_len + t} exceeds block size {self.config.block_size}"
+
+        attn_mask = None
+        if attention_mask is None:
+            pos = torch.arange(past_len, past_len + t, dtype=torch.long, device=idx.device)
+        else:
+            keys = attention_mask.bool()
+            pos = (keys.long().cumsum(-1) - 1).clamp(min=0)[:, -t:]
+            cols = torch.arange(past_len + t, device=idx.device)
+            rows = torch.arange(past_len, past_len + t, device=idx.device)[:, None]
+            # Causal over real tokens; every position may see itself so padded rows stay finite
+            attn_mask = ((cols <= rows) & keys[:, None, None, :]) | (cols == rows)
+
+        x = self.transformer.drop(self.transformer.wte(idx) + self.transformer.wpe(pos))
+
+        presents = []
+        for i, block in enumerate(self.transformer.h):
+            layer_past = past_key_values[i] if past_key_values is not None else None
+            x, present = block(x, layer_past=layer_past, use_cache=True, attn_mask=attn_mask)
+            presents.append(present)
+
+        x = self.transformer.ln_f(x[:, [-1], :])
+        return self.lm_head(x)[:, -1, :], presents
+
+    def next_token_logits(self, idx, attention_mask=None, past=None, use_cache=True):
+        """
+        One decode step over the running sequence idx (B, T). Returns (logits, past).
+
+        With use_cache=True only the newest token is run through the model. Positions are
+        absolute, so once the cache reaches block_size it is rebuilt from the last
+        block_size // 2 tokens (a sliding window refreshed every block_size // 2 steps)
+        instead of re-running the full block_size context on every token.
+        """
+        def window(n):
+            mask = attention_mask[:, -n:] if attention_mask is not None else None
+            return self.forward_cached(idx[:, -n:], attention_mask=mask)
+
+        block_size = self.config.block_size
+        if not use_cache:
+            logits, _ = window(block_size)
+            return logits, None
+        if past is None:
+            return window(block_size)
+        past_len = past[0][0].size(2)
+        if past_len >= block_size:
+            return window(max(1, block_size // 2))
+        mask = attention_mask[:, -(past_len + 1):] if attention_mask is not None else None
+        return self.forward_cached(idx[:, -1:], past, mask)
+
+    @torch.no_grad()
+    def generate_enhanced(self, idx, max_new_tokens, temperature=0.8, top_k=50, top_p=0.9,
+                         repetition_penalty=1.2, no_repeat_ngram_size=3, use_cache=True,
+                         attention_mask=None):
+        """
+        Enhanced text generation with coherence improvements.
+
+        idx may hold several sequences (B, T); they are sampled together, one forward
+        per step. Pass attention_mask (B, T) when the prompts are left-padded.
+        """
+        tracker = RepetitionTracker(idx.size(0), self.config.vocab_size, no_repeat_ngram_size, idx.device)
+        past = None
+
+        for _ in range(max_new_tokens):
+            logits, past = self.next_token_logits(idx, attention_mask, past, use_cache)
+            logits = logits.float()
+
+            # Apply repetition penalty and n-gram blocking
+            logits = tracker.apply(logits, repetition_penalty)
+
+            # Apply temperature
+            logits = logits / temperature
+
+            # Apply top-k filtering
+            if top_k > 0:
+                v, _ = torch.topk(logits, min(top_k, logits.size(-1)))
+                logits[logits < v[:, [-1]]] = float('-inf')
+
+            # Apply top-p filtering
+            if top_p < 1.0:
+                sorted_logits, sorted_indices = torch.sort(logits, descending=True)
+                cumulative_probs = torch.cumsum(F.softmax(sorted_logits, dim=-1), dim=-1)
+
+                sorted_indices_to_remove = cumulative_probs > top_p
+                sorted_indices_to_remove[..., 1:] = sorted_indices_to_remove[..., :-1].clone()
+                sorted_indices_to_remove[..., 0] = 0
+
+                indices_to_remove = sorted_indices_to_remove.scatter(1, sorted_indices, sorted_indices_to_remove)
+                logits[indices_to_remove] = float('-inf')
+
+            probs = F.softmax(logits, dim=-1)
+            idx_next = torch.multinomial(probs, num_samples=1)
+
+            idx = torch.cat((idx, idx_next), dim=1)
+            if attention_mask is not None:
+                attention_mask = torch.cat((attention_mask, torch.ones_like(idx_next)), dim=1)
+            tracker.update(idx_next)
+
+        return idx
+
+
+class TextGenerator:
+    def __init__(self, model, tokenizer, device):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.device = device
+
+        # Handle DataParallel
+        if hasattr(model, 'module'):
+            self.model_core = model.module
+        else:
+            self.model_core = model
+
+    def encode_batch(self, prompts, repeats=1):
+        """
+        Left-pads the encoded prompts into one (len(prompts) * repeats, T) tensor.
+        Returns (input_ids, attention_mask); the mask is None when no padding was needed.
+        """
+        encoded = [ids for ids in (self.tokenizer.encode(p) for p in prompts) for _ in range(repeats)]
+        max_len = max(len(ids) for ids in encoded)
+        pad_id = self.tokenizer.pad_token_id or 0
+
+        input_ids = torch.full((len(encoded), max_len), pad_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(encoded), max_len), dtype=torch.long)
+        for row, ids in enumerate(encoded):
+            input_ids[row, max_len - len(ids):] = torch.tensor(ids, dtype=torch.long)
+            attention_mask[row, max_len - len(ids):] = 1
+
+        input_ids = input_ids.to(self.device)
+        if bool(attention_mask.all()):
+            return input_ids, None
+        return input_ids, attention_mask.to(self.device)
+
+    def decode_rows(self, output, prompt_mask):
+        """Decodes each row, dropping its left padding."""
+        pad = (prompt_mask == 0).sum(dim=1).tolist() if prompt_mask is not None else [0] * output.size(0)
+        return [
+            self.tokenizer.decode(row[n:].tolist(), skip_special_tokens=True)
+            for row, n in zip(output, pad)
+        ]
+
+    def generate(self, prompt, max_length=200, temperature=0.8, top_k=50, top_p=0.9,
+                repetition_penalty=1.2, no_repeat_ngram_size=3, num_return_sequences=1,
+                use_cache=True):
+        """Generate coherent text from prompt"""
+        return self.generate_batch(
+            [prompt], max_length, temperature, top_k, top_p, repetition_penalty,
+            no_repeat_ngram_size, num_return_sequences, use_cache
+        )[0]
+
+    def generate_batch(self, prompts, max_length=200, temperature=0.8, top_k=50, top_p=0.9,
+                       repetition_penalty=1.2, no_repeat_ngram_size=3, num_return_sequences=1,
+                       use_cache=True):
+        """
+        Samples num_return_sequences continuations for every prompt in one batch,
+        i.e. one forward per step for all of them. Returns a list of lists of strings.
+        """
+        self.model.eval()
+
+        with torch.no_grad():
+            input_ids, attention_mask = self.encode_batch(prompts, num_return_sequences)
+            output = self.model_core.generate_enhanced(
+                input_ids,
+                max_new_tokens=max_length,
+                temperature=temperature,
+                top_k=top_k,
+                top_p=top_p,
+                repetition_penalty=repetition_penalty,
+                no_repeat_ngram_size=no_repeat_ngram_size,
+                use_cache=use_cache,
+                attention_mask=attention_mask
+            )
+            texts = self.decode_rows(output, attention_mask)
+
+        n = num_return_sequences
+        return [texts[i * n:(i + 1) * n] for i in range(len(prompts))]
+
+    def beam_search(self, prompt, beam_width=3, max_length=200):
+        """Generate using beam search for more coherent output"""
+        return self.beam_search_batch([prompt], beam_width, max_length)[0]
+
+    def beam_search_batch(self, prompts, beam_width=3, max_length=200):
+        """
+        Beam search for several prompts at once. All prompts x beams are decoded as one
+        (len(prompts) * beam_width, T) batch with a shared KV cache; scores stay on-tensor.
+        """
+        self.model.eval()
+        P, W = len(prompts), beam_width
+
+        with torch.no_grad():
+            seqs, attention_mask = self.encode_batch(prompts, W)
+
+            # Beams of a prompt start identical, so only beam 0 is live on the first step
+            scores = torch.full((P, W), float('-inf'), device=self.device)
+            scores[:, 0] = 0.0
+            past = None
+            offsets = (torch.arange(P, device=self.device) * W)[:, None]
+
+            for _ in range(max_length):
+                logits, past = self.model_core.next_token_logits(seqs, attention_mask, past)
+                log_probs = F.log_softmax(logits.float(), dim=-1)
+                topk_log_probs, topk_indices = torch.topk(log_probs, W)           # (P*W, W)
+
+                candidates = (scores.view(-1, 1) + topk_log_probs).view(P, W * W)
+                scores, flat = torch.topk(candidates, W)                           # (P, W)
+                beam_rows = (offsets + flat // W).view(-1)
+                next_tokens = topk_indices.view(P, W * W).gather(1, flat).view(-1, 1)
+
+                seqs = torch.cat([seqs[beam_rows], next_tokens], dim=1)
+                if attention_mask is not None:
+                    attention_mask = torch.cat(
+                        [attention_mask[beam_rows], torch.ones_like(next_tokens)], dim=1
+                    )
+                past = [(k[beam_rows], v[beam_rows]) for k, v in past]
+
+            best_rows = (offsets[:, 0] + scores.argmax(dim=1))
+            texts = self.decode_rows(
+                seqs[best_rows], attention_mask[best_rows] if attention_mask is not None else None
+            )
+        return texts
+
+    def interactive_generate(self):
+        """Interactive text generation interface"""
+        print("\n" + "="*60)
+        print("INTERACTIVE TEXT GENERATION")
+        print("="*60)
+        print("Type 'quit' to exit, 'help' for options")
+        print("="*60)
+
+        while True:
+            prompt = input("\nPrompt > ").strip()
+
+            if prompt.lower() == 'quit':
+                break
+            elif prompt.lower() == 'help':
+                print("\nOptions:")
+                print("  Temperature: Controls randomness (0.1-1.0)")
+                print("  Max length: Maximum tokens to generate")
+                print("  Method: 'sample' or 'beam' search")
+                continue
+            elif not prompt:
+                continue
+
+            # Get generation parameters
+            print("\nGeneration settings (press Enter for defaults):")
+            temp = float(input("  Temperature (0.8): ") or 0.8)
+            max_len = int(input("  Max length (200): ") or 200)
+            method = input("  Method [sample/beam] (sample): ") or 'sample'
+
+            print("\nGenerating...", end="")
+
+            if method == 'beam':
+                result = self.beam_search(prompt, beam_width=3, max_length=max_len)
+            else:
+                results = self.generate(
+                    prompt,
+                    max_length=max_len,
+                    temperature=temp,
+                    repetition_penalty=1.3,
+                    no_repeat_ngram_size=3
+                )
+                result = results[0]
+
+            print(" Done!")
+            print("\n" + "="*60)
+            print("GENERATED TEXT:")
+            print("="*60)
+            print(result)
+            print("="*60)
+
+
+def config_from_dict(config_dict):
+    # model_config.json may carry extra keys such as model_params
+    known = {f.name for f in fields(GPTConfig)}
+    return GPTConfig(**{k: v for k, v in config_dict.items() if k in known})
+
+
+def config_to_dict(config):
+    return {f.name: getattr(config, f.name) for f in fields(GPTConfig)}
+
+
+def strip_training_modules(model):
+    """Replaces dropout layers with identities; the result is for inference only."""
+    model.config.dropout = 0.0
+    for module in model.modules():
+        for name, child in module.named_children():
+            if isinstance(child, nn.Dropout):
+                setattr(module, name, nn.Identity())
+        if isinstance(module, MultiHeadAttention):
+            module.dropout = 0.0
+    return model.eval()
+
+
+def to_inference_format(model, fmt):
+    """
+    Converts an fp32 GPTModel for CPU inference:
+    'int8' = dynamic int8 quantization of every nn.Linear, 'bf16' = bfloat16 weights.
+    """
+    model = strip_training_modules(model)
+    if fmt == 'int8':
+        return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+    if fmt == 'bf16':
+        return model.to(torch.bfloat16)
+    if fmt == 'fp32':
+        return model
+    raise ValueError(f"Unknown inference format: {fmt}")
+
+
+def load_model(weights_path, config_path='model_config.json', device='cpu'):
+    """
+    Builds a GPTModel from model_config.json and a saved checkpoint or plain state_dict
+    (best_model.pt / marathi_gpt_final.pt), in eval mode on `device`.
+
+    Inference artifacts written by katha_export.py carry their own config and format
+    ('int8' / 'bf16'); for those config_path is not needed.
+    """
+    checkpoint = torch.load(weights_path, map_location='cpu', weights_only=False)
+
+    if isinstance(checkpoint, dict) and 'inference_format' in checkpoint:
+        model = GPTModel(config_from_dict(checkpoint['config_dict']))
+        model = to_inference_format(model, checkpoint['inference_format'])
+        model.load_state_dict(checkpoint['model_state_dict'])
+        return model.to(device).eval()
+
+    with open(config_path, 'r') as f:
+        config = config_from_dict(json.load(f))
+    state = checkpoint.get('model_state_dict', checkpoint) if isinstance(checkpoint, dict) else checkpoint
+
+    model = GPTModel(config)
+    model.load_state_dict(state)
+    return model.to(device).eval()
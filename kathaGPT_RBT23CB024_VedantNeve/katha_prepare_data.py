@@ -0,0 +1,147 @@
+"""
+Resumable, parallel tokenization of the Marathi stories corpus into train.bin / validation.bin.
+
+1. Tokenize with datasets.map (num_proc workers; Hugging Face caches the result, so
+   a rerun reuses it).
+2. From the per-story lengths, compute every shard's offset in the output file up
+   front, then let a pool of workers each copy their shard's tokens straight into
+   their own range of the uint16 memmap.
+3. Record finished shards in prep_manifest.json. An interrupted run picks up with
+   the shards that are still missing instead of starting over.
+
+    python katha_prepare_data.py --out-dir . --num-proc 8
+"""
+
+import argparse
+import json
+import os
+from multiprocessing import Pool
+
+import numpy as np
+
+DATASET_NAME = "TinyStories-Regional/marathi-generated_4o-mini_2M"
+TOKENIZER_NAME = "l3cube-pune/marathi-gpt"
+MANIFEST_NAME = "prep_manifest.json"
+NUM_SHARDS = 1024
+
+# Set in each worker by _init_worker()
+_worker_dset = None
+_worker_path = None
+
+
+def load_manifest(path):
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            return json.load(f)
+    return {}
+
+
+def save_manifest(manifest, path):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp, path)
+
+
+def shard_bounds(lengths, num_shards):
+    """Token [start, end) of each contiguous shard, matching Dataset.shard(contiguous=True)."""
+    n = len(lengths)
+    # Same split as datasets: the first n % num_shards shards get one extra row
+    div, mod = divmod(n, num_shards)
+    row_ends = np.array([(i + 1) * div + min(i + 1, mod) for i in range(num_shards)], dtype=np.int64)
+    token_ends = np.concatenate([[0], np.cumsum(lengths, dtype=np.uint64)])[row_ends]
+    token_starts = np.concatenate([[0], token_ends[:-1]])
+    return token_starts.astype(np.int64), token_ends.astype(np.int64)
+
+
+def _init_worker(dset, path):
+    global _worker_dset, _worker_path
+    _worker_dset, _worker_path = dset, path
+
+
+def _write_shard(args):
+    """Copies one shard's token ids into its precomputed range of the output memmap."""
+    index, num_shards, start, end = args
+    shard = _worker_dset.shard(num_shards=num_shards, index=index, contiguous=True).with_format('arrow')
+    out = np.memmap(_worker_path, dtype=np.uint16, mode='r+', offset=int(start) * 2, shape=(int(end - start),))
+
+    pos = 0
+    for chunk in shard[:].column('ids').chunks:
+        values = chunk.flatten().to_numpy(zero_copy_only=False)
+        out[pos:pos + len(values)] = values
+        pos += len(values)
+    assert pos == end - start, f"shard {index}: wrote {pos} tokens, expected {end - start}"
+    out.flush()
+    del out
+    return index
+
+
+def write_split(dset, path, manifest, manifest_path, key, num_shards=NUM_SHARDS, num_proc=1):
+    """Writes one tokenized split to `path`, resuming from `manifest[key]` when it matches."""
+    lengths = np.asarray(dset['len'], dtype=np.uint64)
+    total = int(lengths.sum())
+    num_shards = min(num_shards, len(dset))
+    starts, ends = shard_bounds(lengths, num_shards)
+
+    state = manifest.get(key)
+    if (not state or state['total_tokens'] != total or state['num_shards'] != num_shards
+            or not os.path.exists(path) or os.path.getsize(path) != total * 2):
+        # New or incompatible output: allocate the full file and start over
+        np.memmap(path, dtype=np.uint16, mode='w+', shape=(total,)).flush()
+        state = manifest[key] = {'total_tokens': total, 'num_shards': num_shards, 'completed': []}
+        save_manifest(manifest, manifest_path)
+
+    done = set(state['completed'])
+    todo = [(i, num_shards, starts[i], ends[i]) for i in range(num_shards) if i not in done]
+    print(f"{path}: {total:,} tokens, {num_shards} shards, {len(done)} already written, {len(todo)} to go")
+    if not todo:
+        return
+
+    with Pool(max(1, num_proc), initializer=_init_worker, initargs=(dset, path)) as pool:
+        for n, index in enumerate(pool.imap_unordered(_write_shard, todo), 1):
+            state['completed'].append(index)
+            # Manifest updates are cheap; don't rewrite it for every single shard
+            if n % 16 == 0 or n == len(todo):
+                save_manifest(manifest, manifest_path)
+                print(f"  {len(state['completed'])}/{num_shards} shards written")
+
+
+def prepare_data(out_dir='.', num_proc=None, num_shards=NUM_SHARDS):
+    """Tokenizes the corpus and writes {out_dir}/train.bin and {out_dir}/validation.bin."""
+    from datasets import load_dataset, DatasetDict
+    from transformers import AutoTokenizer
+
+    num_proc = num_proc or min(8, os.cpu_count())
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+
+    full_ds = load_dataset(DATASET_NAME)
+    split = full_ds['train'].train_test_split(test_size=0.02, seed=42)
+    ds = DatasetDict({'train': split['train'], 'validation': split['test']})
+
+    tokenizer = AutoTokenizer.from_pretrained(TOKENIZER_NAME)
+
+    def process(example):
+        ids = tokenizer.encode(example['story'])
+        return {'ids': ids, 'len': len(ids)}
+
+    tokenized = ds.map(process, remove_columns=['story', 'ID'], desc="Tokenizing", num_proc=num_proc)
+
+    for split_name, dset in tokenized.items():
+        write_split(dset, os.path.join(out_dir, f'{split_name}.bin'), manifest, manifest_path,
+                    split_name, num_shards, num_proc)
+    print("Data preparation complete!")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Tokenize the Marathi stories corpus into train.bin / validation.bin")
+    ap.add_argument("--out-dir", default=".")
+    ap.add_argument("--num-proc", type=int, default=None)
+    ap.add_argument("--num-shards", type=int, default=NUM_SHARDS)
+    args = ap.parse_args()
+    prepare_data(args.out_dir, args.num_proc, args.num_shards)
+
+
+if __name__ == "__main__":
+    main()
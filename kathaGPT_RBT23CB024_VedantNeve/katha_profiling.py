@@ -0,0 +1,168 @@
+"""
+Training throughput and memory instrumentation for the Katha-GPT Trainer.
+
+TrainingProfiler counts tokens on every iteration and, on every `sample_every`-th
+iteration, times the data / forward / backward / optimizer phases (synchronising
+the GPU at phase boundaries so the split is real). At each eval interval it
+appends one JSON line with tokens/sec, the mean phase split, gradient-accumulation
+overhead and peak memory. Under DDP, `tokens` and `tokens_per_sec` count all ranks
+(this rank's figure times world_size, as every rank runs the same number of
+identically sized steps); `tokens_per_sec_per_rank` is this rank alone. An optional
+torch.profiler trace can be captured for a window of iterations.
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+
+import torch
+
+PHASES = ('data', 'forward', 'backward', 'optimizer')
+
+
+def peak_memory_mb(device):
+    if 'cuda' in str(device) and torch.cuda.is_available():
+        return torch.cuda.max_memory_allocated() / 1024**2
+    try:
+        import resource
+        # ru_maxrss is KB on Linux (process lifetime peak)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        return None
+
+
+class TrainingProfiler:
+    def __init__(self, log_path, device, tokens_per_micro_step, gradient_accumulation_steps,
+                 sample_every=10, trace_dir=None, trace_start=None, trace_steps=5, world_size=1):
+        self.log_path = log_path
+        self.device = device
+        self.tokens_per_iter = tokens_per_micro_step * gradient_accumulation_steps
+        self.world_size = world_size
+        self.accum_steps = gradient_accumulation_steps
+        self.sample_every = max(1, sample_every)
+        self.is_cuda = 'cuda' in str(device) and torch.cuda.is_available()
+
+        self.trace_dir = trace_dir
+        self.trace_start = trace_start
+        self.trace_steps = trace_steps
+        self._trace = None
+
+        self._reset()
+
+    def _reset(self):
+        self.interval_start = time.perf_counter()
+        self.iters = 0
+        self.sampled = 0
+        self.phase_s = dict.fromkeys(PHASES, 0.0)
+        self.iter_s = 0.0
+        self.eval_s = 0.0
+        self._sampling = False
+        if self.is_cuda:
+            torch.cuda.reset_peak_memory_stats()
+
+    def _sync(self):
+        if self.is_cuda:
+            torch.cuda.synchronize()
+
+    def step_begin(self, iter_num):
+        self._sampling = iter_num % self.sample_every == 0
+        if self._sampling:
+            self._sync()
+            self._iter_t0 = time.perf_counter()
+
+        if self.trace_dir and self.trace_start is not None and iter_num == self.trace_start:
+            self._start_trace()
+
+    def step_end(self, iter_num):
+        self.iters += 1
+        if self._sampling:
+            self._sync()
+            self.iter_s += time.perf_counter() - self._iter_t0
+            self.sampled += 1
+
+        if self._trace is not None:
+            self._trace.step()
+            if iter_num + 1 >= self.trace_start + self.trace_steps:
+                self._stop_trace()
+
+    @contextmanager
+    def _timed(self, name):
+        self._sync()
+        t0 = time.perf_counter()
+        yield
+        self._sync()
+        self.phase_s[name] += time.perf_counter() - t0
+
+    def phase(self, name):
+        """Context manager timing `name` on sampled iterations; a no-op otherwise."""
+        return self._timed(name) if self._sampling else nullcontext()
+
+    @contextmanager
+    def evaluating(self):
+        """Excludes the wrapped time (e.g. estimate_loss) from the interval's training throughput."""
+        t0 = time.perf_counter()
+        yield
+        self.eval_s += time.perf_counter() - t0
+
+    def flush(self, iter_num, **extra):
+        """Appends this interval's summary to the JSONL log and starts a new interval."""
+        elapsed = time.perf_counter() - self.interval_start - self.eval_s
+        rank_tokens = self.iters * self.tokens_per_iter
+        record = {
+            'iter': iter_num,
+            'iters': self.iters,
+            'elapsed_s': round(elapsed, 3),
+            'eval_s': round(self.eval_s, 3),
+            'world_size': self.world_size,
+            'tokens': rank_tokens * self.world_size,
+            'tokens_per_sec': round(rank_tokens * self.world_size / elapsed, 1) if elapsed > 0 else None,
+            'tokens_per_sec_per_rank': round(rank_tokens / elapsed, 1) if elapsed > 0 else None,
+            'sampled_iters': self.sampled,
+        }
+        if self.sampled:
+            per_iter = {k: v / self.sampled * 1e3 for k, v in self.phase_s.items()}
+            iter_ms = self.iter_s / self.sampled * 1e3
+            record.update({f'{k}_ms': round(v, 2) for k, v in per_iter.items()})
+            record['iter_ms'] = round(iter_ms, 2)
+            # Time per iteration not spent in the four phases: zero_grad, loss.item() syncs,
+            # scaler bookkeeping and the Python loop around the micro-steps
+            record['accum_overhead_ms'] = round(iter_ms - sum(per_iter.values()), 2)
+            record['micro_step_ms'] = round((per_iter['data'] + per_iter['forward'] + per_iter['backward'])
+                                            / self.accum_steps, 2)
+            compute = per_iter['forward'] + per_iter['backward'] + per_iter['optimizer']
+            record['data_bound_fraction'] = round(per_iter['data'] / iter_ms, 4) if iter_ms else None
+            record['compute_fraction'] = round(compute / iter_ms, 4) if iter_ms else None
+        peak = peak_memory_mb(self.device)
+        record['peak_memory_mb'] = round(peak, 1) if peak is not None else None
+        record.update(extra)
+
+        # log_path=None (e.g. non-zero DDP ranks) measures without writing
+        if self.log_path:
+            os.makedirs(os.path.dirname(self.log_path) or '.', exist_ok=True)
+            with open(self.log_path, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+        self._reset()
+        return record
+
+    def _start_trace(self):
+        from torch.profiler import profile, ProfilerActivity, tensorboard_trace_handler
+        activities = [ProfilerActivity.CPU]
+        if self.is_cuda:
+            activities.append(ProfilerActivity.CUDA)
+        self._trace = profile(
+            activities=activities,
+            on_trace_ready=tensorboard_trace_handler(self.trace_dir),
+            record_shapes=True,
+            profile_memory=True,
+        )
+        self._trace.__enter__()
+
+    def _stop_trace(self):
+        self._trace.__exit__(None, None, None)
+        self._trace = None
+        print(f"Profiler trace written to {self.trace_dir}")
+
+    def close(self):
+        if self._trace is not None:
+            self._stop_trace()
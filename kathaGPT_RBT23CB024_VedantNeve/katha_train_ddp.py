@@ -0,0 +1,116 @@
+"""
+DistributedDataParallel training for Katha-GPT, launched with torchrun.
+
+One process per GPU (NCCL), or several CPU processes (gloo) on a multi-core machine.
+Each rank samples its own batches from the train.bin / validation.bin memmaps,
+gradients are all-reduced once per optimizer step, and rank 0 writes checkpoints,
+model_config.json and training_metrics.jsonl to --out-dir.
+
+    torchrun --nproc_per_node=4 katha_train_ddp.py --data-dir . --out-dir runs/ddp
+    torchrun --nproc_per_node=4 katha_train_ddp.py --resume runs/ddp/best_model.pt
+
+Local CPU smoke test with a tiny model:
+
+    torchrun --nproc_per_node=2 katha_train_ddp.py --device cpu --n-layer 2 --n-head 2 \
+        --n-embd 64 --block-size 64 --batch-size 4 --max-iters 40 --eval-interval 20 --eval-iters 5
+"""
+
+import argparse
+import json
+import os
+
+import torch
+import torch.distributed as dist
+from torch.nn.parallel import DistributedDataParallel
+
+from katha_model import GPTConfig, GPTModel, config_from_dict
+from katha_trainer import BATCH_SIZE, DATA_SEED, EVAL_ITERS, Trainer
+
+
+def setup_distributed(device):
+    """Initialises the process group from torchrun's environment; returns (device, local_rank)."""
+    local_rank = int(os.environ.get('LOCAL_RANK', 0))
+    if device == 'auto':
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+
+    if device == 'cuda':
+        torch.cuda.set_device(local_rank)
+        device = f'cuda:{local_rank}'
+        backend = 'nccl'
+    else:
+        # Split the cores between the local processes instead of oversubscribing them
+        local_world_size = int(os.environ.get('LOCAL_WORLD_SIZE', 1))
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // local_world_size))
+        backend = 'gloo'
+
+    dist.init_process_group(backend=backend)
+    return device, local_rank
+
+
+def build_config(args):
+    if args.config:
+        with open(args.config, 'r') as f:
+            return config_from_dict(json.load(f))
+    return GPTConfig(
+        vocab_size=args.vocab_size,
+        block_size=args.block_size,
+        n_layer=args.n_layer,
+        n_head=args.n_head,
+        n_embd=args.n_embd,
+        dropout=args.dropout,
+        bias=True
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser(description="DDP training for Katha-GPT (launch with torchrun)")
+    ap.add_argument("--data-dir", default=".", help="Directory with train.bin and validation.bin")
+    ap.add_argument("--out-dir", default=".", help="Checkpoints, model_config.json and metrics go here")
+    ap.add_argument("--device", choices=["auto", "cuda", "cpu"], default="auto")
+    ap.add_argument("--resume", default=None, help="Checkpoint to continue training from")
+    ap.add_argument("--config", default=None, help="model_config.json (overrides the model size flags)")
+    ap.add_argument("--vocab-size", type=int, default=50257)
+    ap.add_argument("--block-size", type=int, default=256)
+    ap.add_argument("--n-layer", type=int, default=8)
+    ap.add_argument("--n-head", type=int, default=8)
+    ap.add_argument("--n-embd", type=int, default=512)
+    ap.add_argument("--dropout", type=float, default=0.1)
+    ap.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Per-rank micro-batch size")
+    ap.add_argument("--grad-accum", type=int, default=4)
+    ap.add_argument("--max-iters", type=int, default=20000)
+    ap.add_argument("--eval-interval", type=int, default=500)
+    ap.add_argument("--eval-iters", type=int, default=EVAL_ITERS)
+    ap.add_argument("--learning-rate", type=float, default=3e-4)
+    ap.add_argument("--seed", type=int, default=DATA_SEED)
+    args = ap.parse_args()
+
+    device, local_rank = setup_distributed(args.device)
+    rank = dist.get_rank()
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    # Same initial weights on every rank (DDP also broadcasts rank 0's on wrap)
+    torch.manual_seed(args.seed)
+    config = build_config(args)
+    model = GPTModel(config).to(device)
+    model = DistributedDataParallel(model, device_ids=[local_rank] if device.startswith('cuda') else None)
+
+    trainer = Trainer(
+        model, config, device, out_dir=args.out_dir, data_dir=args.data_dir,
+        batch_size=args.batch_size, gradient_accumulation_steps=args.grad_accum,
+        learning_rate=args.learning_rate, max_iters=args.max_iters, eval_interval=args.eval_interval,
+        eval_iters=args.eval_iters, data_seed=args.seed
+    )
+    if rank == 0:
+        print(f"Per-step batch: {trainer.effective_batch_size} sequences across {trainer.world_size} ranks")
+
+    if args.resume:
+        trainer.load_checkpoint(args.resume)
+    trainer.train(resume=bool(args.resume))
+
+    for loader in trainer.loaders.values():
+        loader.close()
+    dist.destroy_process_group()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+"""
+Katha-GPT training loop.
+
+Used by the katha_gpt.py notebook (single process, optionally DataParallel) and by
+katha_train_ddp.py under torchrun (DistributedDataParallel, NCCL or gloo/CPU).
+When a torch.distributed process group is initialised, each rank samples its own
+batches, losses are all-reduced for evaluation, and only rank 0 writes checkpoints,
+logs and console output.
+"""
+
+import os
+import math
+import json
+import time
+from contextlib import nullcontext
+
+import numpy as np
+import torch
+import torch.distributed as dist
+from torch.nn.parallel import DataParallel, DistributedDataParallel
+from torch.optim.lr_scheduler import CosineAnnealingWarmRestarts
+from tqdm.auto import tqdm
+
+from katha_data import MemmapLoader
+from katha_profiling import TrainingProfiler
+
+# Data defaults; katha_export reads them to score the same validation batches
+BATCH_SIZE = 12
+EVAL_ITERS = 100
+DATA_SEED = 1337
+
+
+def eval_seed(data_seed, split):
+    """Seed of the batches estimate_loss draws for split (training batches use data_seed)."""
+    return data_seed + (2 if split == 'validation' else 1)
+
+
+class Trainer:
+    def __init__(self, model, config, device, out_dir='.', data_dir='.', batch_size=BATCH_SIZE,
+                 gradient_accumulation_steps=4, learning_rate=3e-4, max_iters=20000, eval_interval=500,
+                 eval_iters=EVAL_ITERS, data_seed=DATA_SEED):
+        self.model = model
+        self.config = config
+        self.device = device
+        self.is_data_parallel = isinstance(model, DataParallel)
+        self.out_dir = out_dir
+        self.data_dir = data_dir
+
+        # torch.distributed (torchrun) state; a single process is rank 0 of 1
+        self.is_ddp = isinstance(model, DistributedDataParallel)
+        self.rank = dist.get_rank() if self.is_ddp else 0
+        self.world_size = dist.get_world_size() if self.is_ddp else 1
+        self.is_master = self.rank == 0
+
+        # Training hyperparameters
+        self.learning_rate = learning_rate
+        self.min_lr = 1e-5
+        self.warmup_steps = 1000
+        self.max_iters = max_iters
+        self.eval_interval = eval_interval
+        self.eval_iters = eval_iters
+        self.batch_size = batch_size
+        self.gradient_accumulation_steps = gradient_accumulation_steps
+        self.max_grad_norm = 1.0
+        self.data_seed = data_seed
+        self.prefetch_batches = 4
+
+        # Instrumentation: phase timings sampled every profile_every iterations,
+        # written to metrics_log at each eval interval. Set profile_trace_start to
+        # an iteration number to capture a torch.profiler trace of profile_trace_steps steps.
+        self.metrics_log = os.path.join(out_dir, 'training_metrics.jsonl')
+        self.profile_every = 10
+        self.profile_trace_dir = os.path.join(out_dir, 'profiler_traces')
+        self.profile_trace_start = None
+        self.profile_trace_steps = 5
+
+        # Calculate effective batch size
+        self.effective_batch_size = self.batch_size * self.gradient_accumulation_steps
+        if torch.cuda.device_count() > 1 and self.is_data_parallel:
+            self.effective_batch_size *= torch.cuda.device_count()
+        self.effective_batch_size *= self.world_size
+
+        self.log(f"\nTraining Configuration:")
+        self.log(f"  Effective batch size: {self.effective_batch_size}")
+        self.log(f"  Learning rate: {self.learning_rate}")
+        self.log(f"  Max iterations: {self.max_iters}")
+        self.log(f"  Using DataParallel: {self.is_data_parallel}")
+        if self.is_ddp:
+            self.log(f"  Using DistributedDataParallel: {self.world_size} processes ({dist.get_backend()})")
+
+        # Optimizer
+        self.optimizer = torch.optim.AdamW(
+            self.model.parameters(),
+            lr=self.learning_rate,
+            betas=(0.9, 0.95),
+            eps=1e-8,
+            weight_decay=0.1
+        )
+
+        # Scheduler
+        self.scheduler = CosineAnnealingWarmRestarts(
+            self.optimizer,
+            T_0=self.warmup_steps,
+            T_mult=2,
+            eta_min=self.min_lr
+        )
+
+        # Mixed precision
+        self.use_amp = True and torch.cuda.is_available() and 'cuda' in str(device)
+        self.scaler = torch.cuda.amp.GradScaler(enabled=self.use_amp)
+
+        # Tracking
+        self.train_losses = []
+        self.val_losses = []
+        self.best_val_loss = float('inf')
+        self.start_iter = 0
+
+        # Persistent, prefetching data loaders (opened on first use)
+        self.loaders = {}
+
+    def log(self, *args, **kwargs):
+        """print() on rank 0 only."""
+        if self.is_master:
+            print(*args, **kwargs)
+
+    def get_loader(self, split, for_eval=False):
+        """
+        The training stream is seekable for resume; eval batches come from separate streams.
+        Under DDP every rank draws its own batches.
+        """
+        key = (split, for_eval)
+        if key not in self.loaders:
+            seed = eval_seed(self.data_seed, split) if for_eval else self.data_seed
+            self.loaders[key] = MemmapLoader(
+                os.path.join(self.data_dir, f'{split}.bin'), self.config.block_size, self.batch_size,
+                self.device, seed=seed, prefetch=self.prefetch_batches, rank=self.rank
+            )
+        return self.loaders[key]
+
+    def all_reduce_mean(self, value):
+        """Mean of a Python float over all ranks (identity without DDP)."""
+        if not self.is_ddp:
+            return value
+        t = torch.tensor(value, dtype=torch.float64, device=self.device)
+        dist.all_reduce(t, op=dist.ReduceOp.SUM)
+        return t.item() / self.world_size
+
+    @torch.no_grad()
+    def estimate_loss(self):
+        """Estimate loss on train and validation sets"""
+        out = {}
+        self.model.eval()
+
+        for split in ['train', 'validation']:
+            losses = []
+            loader = self.get_loader(split, for_eval=True)
+            for k in range(self.eval_iters):
+                X, Y = loader.next()
+
+                with torch.cuda.amp.autocast(enabled=self.use_amp):
+                    _, loss = self.model(X, Y)
+
+                    if self.is_data_parallel and loss.dim() > 0:
+                        loss = loss.mean()
+
+                    losses.append(loss.item())
+
+            out[split] = self.all_reduce_mean(float(np.mean(losses)))
+
+        self.model.train()
+        return out
+
+    def train(self, resume=False):
+        """Main training loop"""
+        self.log("\n" + "="*60)
+        self.log("TRAINING STARTED")
+        self.log("="*60)
+
+        self.model.train()
+        start_time = time.time()
+
+        # Resume from checkpoint if requested
+        if resume and hasattr(self, 'start_iter'):
+            start_iter = self.start_iter
+        else:
+            start_iter = 0
+
+        # Every iteration draws exactly gradient_accumulation_steps train batches
+        train_loader = self.get_loader('train')
+        train_loader.seek(start_iter * self.gradient_accumulation_steps)
+
+        prof = TrainingProfiler(
+            self.metrics_log if self.is_master else None, self.device,
+            tokens_per_micro_step=self.batch_size * self.config.block_size,
+            gradient_accumulation_steps=self.gradient_accumulation_steps,
+            sample_every=self.profile_every,
+            trace_dir=self.profile_trace_dir,
+            trace_start=self.profile_trace_start,
+            trace_steps=self.profile_trace_steps,
+            world_size=self.world_size,
+        )
+
+        for iter_num in tqdm(range(start_iter, self.max_iters), desc="Training", initial=start_iter,
+                             disable=not self.is_master):
+
+            # Evaluation
+            if iter_num % self.eval_interval == 0 and iter_num > 0:
+                with prof.evaluating():
+                    losses = self.estimate_loss()
+                elapsed = time.time() - start_time
+
+                self.log(f"\n" + "="*60)
+                self.log(f"Step {iter_num}/{self.max_iters} | Time: {elapsed:.1f}s")
+                self.log(f"Train loss: {losses['train']:.4f} | Val loss: {losses['validation']:.4f}")
+                self.log(f"Learning rate: {self.optimizer.param_groups[0]['lr']:.6f}")
+
+                try:
+                    perplexity = math.exp(min(losses['validation'], 10))
+                    self.log(f"Perplexity: {perplexity:.2f}")
+                except:
+                    self.log("Perplexity: N/A")
+
+                self.train_losses.append(losses['train'])
+                self.val_losses.append(losses['validation'])
+
+                metrics = prof.flush(
+                    iter_num,
+                    train_loss=float(losses['train']),
+                    val_loss=float(losses['validation']),
+                    lr=self.optimizer.param_groups[0]['lr'],
+                )
+                self.log(f"Throughput: {metrics['tokens_per_sec']} tokens/s | Peak memory: {metrics['peak_memory_mb']} MB")
+
+                # Save best model (losses are already averaged over ranks, so all ranks agree)
+                if losses['validation'] < self.best_val_loss:
+                    self.best_val_loss = losses['validation']
+                    self.save_checkpoint(os.path.join(self.out_dir, 'best_model.pt'))
+                    self.log(f"Saved best model (val_loss: {self.best_val_loss:.4f})")
+
+                self.log("="*60)
+
+            # Training step
+            prof.step_begin(iter_num)
+            self.optimizer.zero_grad(set_to_none=True)
+
+            loss_accum = 0
+            for micro_step in range(self.gradient_accumulation_steps):
+                with prof.phase('data'):
+                    X, Y = train_loader.next()
+
+                # Under DDP, only all-reduce gradients on the last micro-step
+                last_micro_step = micro_step == self.gradient_accumulation_steps - 1
+                with self.model.no_sync() if self.is_ddp and not last_micro_step else nullcontext():
+                    with prof.phase('forward'):
+                        with torch.cuda.amp.autocast(enabled=self.use_amp):
+                            _, loss = self.model(X, Y)
+
+                            if self.is_data_parallel and loss.dim() > 0:
+                                loss = loss.mean()
+
+                            loss = loss / self.gradient_accumulation_steps
+
+                    loss_accum += loss.item()
+                    with prof.phase('backward'):
+                        self.scaler.scale(loss).backward()
+
+            with prof.phase('optimizer'):
+                # Gradient clipping
+                if self.max_grad_norm > 0:
+                    self.scaler.unscale_(self.optimizer)
+                    torch.nn.utils.clip_grad_norm_(self.model.parameters(), self.max_grad_norm)
+
+                # Optimizer step
+                self.scaler.step(self.optimizer)
+                self.scaler.update()
+
+                # Update learning rate
+                self.scheduler.step()
+
+            prof.step_end(iter_num)
+
+            # Save current iteration
+            self.start_iter = iter_num + 1
+
+        prof.close()
+
+        self.log("\n" + "="*60)
+        self.log("TRAINING COMPLETED")
+        self.log("="*60)
+
+        # Final evaluation
+        final_losses = self.estimate_loss()
+        self.log(f"\nFinal Results:")
+        self.log(f"  Train loss: {final_losses['train']:.4f}")
+        self.log(f"  Val loss: {final_losses['validation']:.4f}")
+
+        try:
+            perplexity = math.exp(min(final_losses['validation'], 10))
+            self.log(f"  Perplexity: {perplexity:.2f}")
+        except:
+            self.log("  Perplexity: N/A")
+
+        # Save final model
+        self.save_checkpoint(os.path.join(self.out_dir, 'marathi_gpt_final.pt'))
+        self.log("\n Final model saved")
+
+    def save_checkpoint(self, path):
+        """Save model checkpoint (rank 0 only under DDP)"""
+        if not self.is_master:
+            return
+        model_to_save = self.model.module if hasattr(self.model, 'module') else self.model
+
+        checkpoint = {
+            'model_state_dict': model_to_save.state_dict(),
+            'optimizer_state_dict': self.optimizer.state_dict(),
+            'scheduler_state_dict': self.scheduler.state_dict(),
+            'train_losses': self.train_losses,
+            'val_losses': self.val_losses,
+            'best_val_loss': self.best_val_loss,
+            'start_iter': self.start_iter,
+            'data_state': {'seed': self.data_seed, 'step': self.start_iter * self.gradient_accumulation_steps},
+            'config_dict': {
+                'vocab_size': self.config.vocab_size,
+                'block_size': self.config.block_size,
+                'n_layer': self.config.n_layer,
+                'n_head': self.config.n_head,
+                'n_embd': self.config.n_embd,
+                'dropout': self.config.dropout,
+                'bias': self.config.bias
+            }
+        }
+        torch.save(checkpoint, path)
+
+        # Also save config separately
+        with open(os.path.join(os.path.dirname(path) or '.', 'model_config.json'), 'w') as f:
+            json.dump(checkpoint['config_dict'], f, indent=2)
+
+    def load_checkpoint(self, path):
+        """Load checkpoint for resuming training"""
+        checkpoint = torch.load(path, map_location=self.device, weights_only=False)
+
+        if hasattr(self.model, 'module'):
+            self.model.module.load_state_dict(checkpoint['model_state_dict'])
+        else:
+            self.model.load_state_dict(checkpoint['model_state_dict'])
+
+        self.optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
+        self.scheduler.load_state_dict(checkpoint['scheduler_state_dict'])
+        self.train_losses = checkpoint.get('train_losses', [])
+        self.val_losses = checkpoint.get('val_losses', [])
+        self.best_val_loss = checkpoint.get('best_val_loss', float('inf'))
+        self.start_iter = checkpoint.get('start_iter', 0)
+        self.data_seed = checkpoint.get('data_state', {}).get('seed', self.data_seed)
+
+        self.log(f"Checkpoint loaded from {path}")
+        self.log(f"Resuming from iteration: {self.start_iter}")
+        self.log(f"Best validation loss: {self.best_val_loss:.4f}")
+
+    def plot_losses(self):
+        """Plot training and validation losses"""
+        import matplotlib.pyplot as plt
+
+        if not self.train_losses:
+            print("No training data to plot")
+            return
+
+        plt.figure(figsize=(12, 5))
+
+        # Loss plot
+        plt.subplot(1, 2, 1)
+        plt.plot(self.train_losses, label='Train Loss', color='blue', alpha=0.7)
+        plt.plot(self.val_losses, label='Val Loss', color='red', alpha=0.7)
+        plt.xlabel(f'Steps (×{self.eval_interval})')
+        plt.ylabel('Loss')
+        plt.title('Training Progress')
+        plt.legend()
+        plt.grid(True, alpha=0.3)
+
+        # Perplexity plot
+        plt.subplot(1, 2, 2)
+        train_perp = [min(math.exp(loss), 1000) for loss in self.train_losses]
+        val_perp = [min(math.exp(loss), 1000) for loss in self.val_losses]
+        plt.plot(train_perp, label='Train Perplexity', color='blue', alpha=0.7)
+        plt.plot(val_perp, label='Val Perplexity', color='red', alpha=0.7)
+        plt.xlabel(f'Steps (×{self.eval_interval})')
+        plt.ylabel('Perplexity')
+        plt.title('Model Perplexity')
+        plt.legend()
+        plt.grid(True, alpha=0.3)
+
+        plt.tight_layout()
+        plt.show()
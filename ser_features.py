@@ -0,0 +1,96 @@
+import numpy as np
+import librosa
+
+# Bump whenever the features this module computes change, so caches keyed on it
+# (train_ser.py's feature cache) stop reusing old vectors
+FEATURIZER_VERSION = 1
+
+# librosa.feature.mfcc defaults (librosa >= 0.10)
+N_FFT = 2048
+HOP_LENGTH = 512
+N_MELS = 128
+TOP_DB = 80.0
+AMIN = 1e-10
+
+def dct_matrix(n_mfcc, n_mels):
+    """Orthonormal DCT-II basis, same as scipy.fft.dct(type=2, norm='ortho')."""
+    n = np.arange(n_mels)
+    k = np.arange(n_mfcc)[:, None]
+    m = np.cos(np.pi / n_mels * (n + 0.5) * k) * np.sqrt(2.0 / n_mels)
+    m[0] /= np.sqrt(2.0)
+    return m
+
+class MFCCFeaturizer:
+    """Batched MFCC featurizer matching librosa.feature.mfcc on single clips.
+
+    The Hann window, mel filterbank and DCT matrix are built once; each call
+    then featurizes a whole (batch, samples) array with a handful of NumPy ops.
+    """
+
+    def __init__(self, sr, dur, n_mfcc, n_fft=N_FFT, hop_length=HOP_LENGTH, n_mels=N_MELS):
+        self.sr, self.dur, self.n_mfcc = sr, dur, n_mfcc
+        self.n_fft, self.hop_length = n_fft, hop_length
+        self.target_len = int(sr * dur)
+        self.window = librosa.filters.get_window("hann", n_fft, fftbins=True)
+        self.mel_basis = librosa.filters.mel(sr=sr, n_fft=n_fft, n_mels=n_mels)
+        self.dct = dct_matrix(n_mfcc, n_mels)
+
+    def pad_or_trim(self, y):
+        if len(y) < self.target_len:
+            return np.pad(y, (0, self.target_len - len(y)))
+        return y[:self.target_len]
+
+    def stack(self, clips):
+        return np.stack([self.pad_or_trim(y) for y in clips])
+
+    def log_mel_frames(self, batch, center=True, clamp=True):
+        """(B, samples) -> (B, frames, n_mels) log-mel power in dB.
+
+        With clamp=True each clip is floored at its own max - TOP_DB, as
+        librosa.power_to_db does. clamp=False leaves the floor out, so frames
+        computed chunk by chunk can be joined and clamped as one clip later
+        (see mfcc_from_log_mel).
+        """
+        batch = np.atleast_2d(batch)
+        if center:
+            pad = self.n_fft // 2
+            batch = np.pad(batch, ((0, 0), (pad, pad)))
+        frames = np.lib.stride_tricks.sliding_window_view(batch, self.n_fft, axis=-1)[:, ::self.hop_length]
+        power = np.abs(np.fft.rfft(frames * self.window, axis=-1)) ** 2
+        mel = power @ self.mel_basis.T
+        log_mel = 10.0 * np.log10(np.maximum(mel, AMIN))
+        if clamp:
+            log_mel = self.clamp(log_mel)
+        return log_mel
+
+    def clamp(self, log_mel):
+        """Top-dB floor relative to each clip's max, over all of its frames."""
+        return np.maximum(log_mel, log_mel.max(axis=(1, 2), keepdims=True) - TOP_DB)
+
+    def mfcc_from_log_mel(self, log_mel):
+        """(B, frames, n_mels) unclamped log-mel -> (B, n_mfcc, frames), clamped per clip."""
+        return (self.clamp(np.asarray(log_mel)) @ self.dct.T).transpose(0, 2, 1)
+
+    def mfcc_frames(self, batch, center=True, clamp=True):
+        """(B, samples) -> (B, n_mfcc, frames); clamp=False skips the top-dB floor."""
+        return (self.log_mel_frames(batch, center, clamp) @ self.dct.T).transpose(0, 2, 1)
+
+    def transform(self, batch):
+        """(B, target_len) equal-length clips -> (B, n_mfcc) mean MFCC features."""
+        return self.mfcc_frames(batch).mean(axis=2)
+
+    def __call__(self, clips):
+        """List of variable-length clips -> (B, n_mfcc); clips are padded/trimmed to dur."""
+        return self.transform(self.stack(clips))
+
+    def extract_features(self, y, sr=None):
+        """Single-clip drop-in for the old per-clip extract_features()."""
+        return self.transform(self.pad_or_trim(y)[None, :])[0]
+
+def predict_with_confidence(pipe, X):
+    """(labels, confidences) for feature rows X.
+
+    Labels come from pipe.predict: with SVC(probability=True) the argmax of
+    predict_proba can disagree with it. Confidence is the top class probability.
+    """
+    return pipe.predict(X), pipe.predict_proba(X).max(axis=1)
@@ -1,6 +1,8 @@
 import os, glob
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import librosa, joblib
+from ser_features import FEATURIZER_VERSION, MFCCFeaturizer
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.svm import SVC
@@ -10,6 +12,8 @@ from sklearn.metrics import classification_report, accuracy_score
 # --- Config ---
 DATA_DIR = "data/ravdess"     # Path to RAVDESS folder
 MODEL_PATH = "models/ser_svm.joblib"
+CACHE_PATH = "models/feature_cache.joblib"   # Per-file MFCC cache
+N_JOBS = os.cpu_count() or 1                  # Featurization worker processes
 SR = 22050                    # Sample rate
 DUR = 3.0                     # Seconds per audio clip
 N_MFCC = 40
@@ -26,15 +30,10 @@ EMO_MAP = {
     "08": "surprised",
 }
 
-# Extract features from audio
-def extract_features(y, sr):
-    target_len = int(SR * DUR)
-    if len(y) < target_len:
-        y = np.pad(y, (0, target_len - len(y)))
-    else:
-        y = y[:target_len]
-    mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=N_MFCC)
-    return np.mean(mfcc, axis=1)
+# Extract features from audio (batched NumPy MFCC, shared with app_gui.py / batch_predict.py)
+FEATURIZER = MFCCFeaturizer(SR, DUR, N_MFCC)
+extract_features = FEATURIZER.extract_features
+FEATURE_BATCH = 32            # Clips featurized together per worker task
 
 # Get emotion from filename
 def parse_emotion_from_filename(path):
@@ -45,18 +44,62 @@ def parse_emotion_from_filename(path):
         return EMO_MAP.get(code, None)
     return None
 
+# Cache key: a file is re-featurized only if it, the feature config or the featurizer changed
+def cache_key(path):
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_mtime_ns, st.st_size, SR, DUR, N_MFCC, "ser_features", FEATURIZER_VERSION)
+
+def load_cache(path=CACHE_PATH):
+    if not os.path.exists(path):
+        return {}
+    try:
+        return joblib.load(path)
+    except Exception as e:
+        print(f"Ignoring unreadable feature cache {path}: {e}")
+        return {}
+
+def save_cache(cache, path=CACHE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    joblib.dump(cache, tmp)
+    os.replace(tmp, path)
+
+# Decode a chunk of files and featurize them as one batch (runs inside a worker process)
+def featurize_files(paths):
+    clips = [librosa.load(p, sr=SR, mono=True)[0] for p in paths]
+    return FEATURIZER(clips)
+
 # Load data & extract features
-def load_data():
-    X, y = [], []
-    wavs = glob.glob(os.path.join(DATA_DIR, "**", "*.wav"), recursive=True)
-    for p in wavs:
-        label = parse_emotion_from_filename(p)
-        if not label:
-            continue
-        audio, sr = librosa.load(p, sr=SR, mono=True)
-        feats = extract_features(audio, sr)
-        X.append(feats)
-        y.append(label)
+def load_data(n_jobs=N_JOBS, use_cache=True):
+    wavs = sorted(glob.glob(os.path.join(DATA_DIR, "**", "*.wav"), recursive=True))
+    labelled = [(p, parse_emotion_from_filename(p)) for p in wavs]
+    labelled = [(p, label) for p, label in labelled if label]
+
+    cache = load_cache() if use_cache else {}
+    keys = {p: cache_key(p) for p, _ in labelled}
+    todo = [p for p, _ in labelled if keys[p] not in cache]
+    print(f"Files: {len(labelled)}, cached: {len(labelled) - len(todo)}, to featurize: {len(todo)}")
+
+    if todo:
+        chunks = [todo[i:i + FEATURE_BATCH] for i in range(0, len(todo), FEATURE_BATCH)]
+        if n_jobs > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=n_jobs) as ex:
+                feats = np.concatenate(list(ex.map(featurize_files, chunks)))
+        else:
+            feats = np.concatenate([featurize_files(c) for c in chunks])
+        for p, f in zip(todo, feats):
+            cache[keys[p]] = f
+
+    if use_cache:
+        # Drop entries for files that were removed or changed since the last run
+        live = set(keys.values())
+        stale = len(cache) - len(live)
+        cache = {k: v for k, v in cache.items() if k in live}
+        if todo or stale:
+            save_cache(cache)
+
+    X = [cache[keys[p]] for p, _ in labelled]
+    y = [label for _, label in labelled]
     return np.array(X), np.array(y)
 
 # Train & save model